@@ -0,0 +1,138 @@
+"""Benchmark of API payload decoding and model parsing.
+
+Builds a synthetic connections payload with 100 patients and a graph payload
+per patient, then reports decode and parse times with the stdlib and the fast
+JSON decoder, and the memory retained by the parsed data.
+
+Run from the repository root with the development requirements installed:
+
+    python -m benchmarks.bench_decode
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+import json
+import timeit
+import tracemalloc
+
+from custom_components.librelink.api import (
+    Measurement,
+    Patient,
+    _parse_readings,
+    json_loads,
+)
+
+from .payloads import connection, reading
+
+PATIENTS = 100
+GRAPH_POINTS = 144
+REPEAT = 5
+
+
+def _payloads() -> tuple[bytes, list[bytes]]:
+    now = 1706713445
+    connections = [
+        connection(f"patient-{i}", reading(now, 100 + i % 100))
+        for i in range(PATIENTS)
+    ]
+    graphs = [
+        {
+            "status": 0,
+            "data": {
+                "connection": connections[i],
+                "activeSensors": [],
+                "graphData": [
+                    reading(now - 300 * j, 80 + j % 120)
+                    for j in range(GRAPH_POINTS, 0, -1)
+                ],
+            },
+            "ticket": {"token": "token", "expires": 1706800000, "duration": 1},
+        }
+        for i in range(PATIENTS)
+    ]
+    connections_payload = {
+        "status": 0,
+        "data": connections,
+        "ticket": {"token": "token", "expires": 1706800000, "duration": 1},
+    }
+    return (
+        json.dumps(connections_payload).encode(),
+        [json.dumps(graph).encode() for graph in graphs],
+    )
+
+
+def _best(func) -> float:
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def _retained(build) -> tuple[object, int]:
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main() -> None:
+    """Run the benchmark."""
+    connections, graphs = _payloads()
+    print(
+        f"{PATIENTS} patients, connections {len(connections) / 1024:.0f} KiB, "
+        f"graphs {sum(map(len, graphs)) / 1024:.0f} KiB"
+    )
+
+    for name, loads in (("stdlib json", json.loads), ("fast path", json_loads)):
+        decode_connections = _best(lambda loads=loads: loads(connections))
+        decode_graphs = _best(lambda loads=loads: [loads(g) for g in graphs])
+        print(
+            f"{name:<12} decode connections {decode_connections * 1e3:7.2f} ms, "
+            f"graphs {decode_graphs * 1e3:7.2f} ms"
+        )
+
+    data = json_loads(connections)["data"]
+    graph_data = [json_loads(graph)["data"] for graph in graphs]
+    parse_patients = _best(lambda: [Patient.from_api_response_data(p) for p in data])
+    parse_graphs = _best(lambda: [_parse_readings(g["graphData"]) for g in graph_data])
+    print(
+        f"parse patients {parse_patients * 1e3:.2f} ms, "
+        f"graph readings to arrays {parse_graphs * 1e3:.2f} ms"
+    )
+
+    def _patients():
+        return [
+            Patient.from_api_response_data(patient)
+            for patient in json_loads(connections)["data"]
+        ]
+
+    def _arrays():
+        return [_parse_readings(json_loads(g)["data"]["graphData"]) for g in graphs]
+
+    def _measurements():
+        result = []
+        for graph in graphs:
+            points = json_loads(graph)["data"]["graphData"]
+            timestamps, values, trends = _parse_readings(points)
+            result.append(
+                [
+                    Measurement(
+                        value=values[i],
+                        timestamp=datetime.fromtimestamp(timestamps[i], tz=UTC),
+                        trend=trends[i],
+                    )
+                    for i in range(len(points))
+                ]
+            )
+        return result
+
+    for name, build in (
+        ("patients", _patients),
+        ("graph readings as arrays", _arrays),
+        ("graph readings as Measurements", _measurements),
+    ):
+        _, size = _retained(build)
+        print(f"retained {name:<31}{size / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""End-to-end load benchmark against the local LibreView stand-in.
+
+Runs one auth manager and one coordinator per account, each following all
+the patients of its account, against benchmarks.fake_libreview. With
+--shared N, each group of N accounts follows the same patients. Every round
+advances the readings by a minute and refreshes every coordinator at once,
+so an hour of readings is simulated in 60 rounds.
+
+Reports polls per second, p50 and p99 refresh latency, CPU time per poll,
+requests and answers seen by the server, graph requests saved by the
+history sync, and the Python memory growth over the simulated hours.
+Memory is traced with tracemalloc, which slows down every poll, so pass
+--no-memory to compare latency and CPU numbers.
+
+Run from the repository root with the development requirements installed,
+on each revision to compare:
+
+    python -m benchmarks.bench_load --accounts 20 --patients 5 --hours 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.librelink.auth import async_get_auth_manager
+from custom_components.librelink.coordinator import LibreLinkDataUpdateCoordinator
+from custom_components.librelink.ratelimit import get_region_limiter
+
+from .fake_libreview import PASSWORD, FakeLibreView, username
+
+
+async def _timed_refresh(coordinator: LibreLinkDataUpdateCoordinator) -> float:
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    logging.disable(logging.CRITICAL)
+    server = FakeLibreView(
+        accounts=args.accounts,
+        patients=args.patients,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        token_lifetime=args.token_lifetime,
+        shared=args.shared,
+    )
+    url = await server.async_start()
+    # The region limiter would cap the benchmark at a few polls per second.
+    limiter = get_region_limiter(url)
+    limiter.rate = limiter.burst = args.region_rate
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    coordinators = []
+    for account in range(args.accounts):
+        auth = async_get_auth_manager(hass, url, username(account), PASSWORD)
+        patient_ids = server.patient_ids(account)
+        coordinator = LibreLinkDataUpdateCoordinator(
+            hass=hass, api=auth.api, patient_id=patient_ids[0], auth=auth
+        )
+        for patient_id in patient_ids[1:]:
+            coordinator.register_patient(patient_id)
+        coordinators.append(coordinator)
+
+    # The first round logs in and backfills the histories, it is not measured.
+    await asyncio.gather(*(_timed_refresh(c) for c in coordinators))
+    gc.collect()
+    if args.memory:
+        tracemalloc.start()
+    memory = [tracemalloc.get_traced_memory()[0]]
+
+    latencies: list[float] = []
+    stale = 0
+    rounds = args.hours * 60
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for round_ in range(1, rounds + 1):
+        server.advance()
+        latencies += await asyncio.gather(*(_timed_refresh(c) for c in coordinators))
+        stale += sum(c.stale or not c.last_update_success for c in coordinators)
+        if args.memory and round_ % 60 == 0:
+            gc.collect()
+            memory.append(tracemalloc.get_traced_memory()[0])
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    tracemalloc.stop()
+
+    polls = len(latencies)
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{args.accounts} accounts x {args.patients} patients, "
+        f"{args.hours} simulated hours, {polls} polls"
+    )
+    print(
+        f"{polls / elapsed:.0f} polls/s, p50 {percentiles[49] * 1e3:.2f} ms, "
+        f"p99 {percentiles[98] * 1e3:.2f} ms, "
+        f"{cpu / polls * 1e3:.2f} ms CPU per poll (server included)"
+    )
+    print(
+        f"{stale} stale or failed polls, {server.logins} logins, "
+        f"requests {dict(server.requests)}, answers {dict(server.responses)}"
+    )
+    counters = [c.api.instrumentation.counters for c in coordinators]
+    print(
+        f"{sum(c['graph_requests_saved'] for c in counters)} graph requests and "
+        f"{sum(c['graph_bytes_saved'] for c in counters) / 1024:.0f} KiB saved "
+        "by the history sync"
+    )
+    if args.memory:
+        growth = ", ".join(f"{(m - memory[0]) / 1024:.0f}" for m in memory[1:])
+        print(f"memory growth per simulated hour, KiB: {growth}")
+
+    await hass.async_stop(force=True)
+    await server.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--patients", type=int, default=5)
+    parser.add_argument("--shared", type=int, default=1)
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--token-lifetime", type=float, default=3600.0)
+    parser.add_argument("--region-rate", type=float, default=1e6)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""Benchmark of entity state writes.
+
+Measures the cost of writing the state of the seven original entities of a
+patient (measurement, trend, application, expiration and last measurement
+timestamps, high and low) for N patients, on a bare Home Assistant core.
+
+Run from the repository root with the development requirements installed,
+on each revision to compare:
+
+    python -m benchmarks.bench_state_writes [patients]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.librelink.api import LibreLinkAPI, Patient
+from custom_components.librelink.binary_sensor import HighSensor, LowSensor
+from custom_components.librelink.coordinator import LibreLinkDataUpdateCoordinator
+from custom_components.librelink.sensor import (
+    ApplicationTimestampSensor,
+    ExpirationTimestampSensor,
+    LastMeasurementTimestampSensor,
+    MeasurementSensor,
+    TrendSensor,
+)
+from custom_components.librelink.units import UNITS_OF_MEASUREMENT
+
+from .payloads import connection, reading
+
+ROUNDS = 50
+
+
+async def main(patients: int) -> None:
+    """Run the benchmark."""
+    logging.disable(logging.WARNING)
+    hass = HomeAssistant(tempfile.mkdtemp())
+    coordinator = LibreLinkDataUpdateCoordinator(
+        hass=hass,
+        api=LibreLinkAPI(base_url="", session=None),
+        patient_id="patient-0",
+    )
+    coordinator.data = {
+        patient.id: patient
+        for patient in (
+            Patient.from_api_response_data(
+                connection(f"patient-{i}", reading(1706713445, 100 + i % 100))
+            )
+            for i in range(patients)
+        )
+    }
+
+    unit = UNITS_OF_MEASUREMENT[0]
+    entities = []
+    for pid in coordinator.data:
+        entities += [
+            MeasurementSensor(coordinator, pid, unit),
+            TrendSensor(coordinator, pid),
+            ApplicationTimestampSensor(coordinator, pid),
+            ExpirationTimestampSensor(coordinator, pid),
+            LastMeasurementTimestampSensor(coordinator, pid),
+            HighSensor(coordinator, pid),
+            LowSensor(coordinator, pid),
+        ]
+    for index, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.librelink_bench_{index}"
+        entity.async_write_ha_state()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for entity in entities:
+            entity.async_write_ha_state()
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    print(
+        f"{len(entities)} entities ({patients} patients): "
+        f"{elapsed * 1e3:.2f} ms per refresh, "
+        f"{elapsed * 1e6 / len(entities):.1f} us per state write"
+    )
+    await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
@@ -0,0 +1,62 @@
+"""Micro-benchmark of LibreView timestamp parsing.
+
+Compares the former ``datetime.strptime`` path with the parsers from
+``timestamps.py`` on 14 days of minute readings.
+
+Run from the repository root with the development requirements installed:
+
+    python -m benchmarks.bench_timestamps
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+import timeit
+
+from custom_components.librelink.timestamps import (
+    parse_timestamp,
+    parse_timestamps_to_epoch,
+)
+
+FORMAT = "%m/%d/%Y %I:%M:%S %p"
+POINTS = 14 * 1440
+REPEAT = 5
+
+
+def _timestamps() -> list[str]:
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    return [
+        (start + timedelta(minutes=i)).strftime(FORMAT).lstrip("0").replace("/0", "/")
+        for i in range(POINTS)
+    ]
+
+
+def _strptime(values: list[str]) -> list[datetime]:
+    return [datetime.strptime(v, FORMAT).replace(tzinfo=UTC) for v in values]
+
+
+def _parse(values: list[str]) -> list[datetime]:
+    return [parse_timestamp(v) for v in values]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    values = _timestamps()
+
+    expected = _strptime(values)
+    assert _parse(values) == expected
+    assert list(parse_timestamps_to_epoch(values)) == [
+        int(d.timestamp()) for d in expected
+    ]
+
+    for name, func in (
+        ("strptime", _strptime),
+        ("parse_timestamp", _parse),
+        ("parse_timestamps_to_epoch", parse_timestamps_to_epoch),
+    ):
+        best = min(timeit.repeat(lambda f=func: f(values), number=1, repeat=REPEAT))
+        print(f"{name:<28}{best * 1e9 / POINTS:10.0f} ns/timestamp")
+
+
+if __name__ == "__main__":
+    main()
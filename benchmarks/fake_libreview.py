@@ -0,0 +1,230 @@
+"""Local stand-in for the LibreView API.
+
+Serves the login, connections and graph endpoints with synthetic patients on
+127.0.0.1. Latency, server errors, 429 answers and token lifetime can be
+configured to reproduce the behaviour of the real service under load.
+
+Readings follow a reading clock that only moves when advance() is called, so
+a benchmark can simulate hours of readings in seconds. Tickets expire on the
+wall clock, like the real ones.
+
+Run from the repository root to serve it on its own:
+
+    python -m benchmarks.fake_libreview [accounts] [patients] [port]
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import math
+import random
+import secrets
+import sys
+import time
+import zlib
+
+from aiohttp import web
+
+from custom_components.librelink.const import CONNECTION_URL, GRAPH_URL, LOGIN_URL
+
+from .payloads import connection, reading
+
+PASSWORD = "password"
+GRAPH_HOURS = 12
+GRAPH_INTERVAL_SECONDS = 300
+
+
+def username(account: int) -> str:
+    """Return the username of an account."""
+    return f"account-{account}@example.com"
+
+
+class FakeLibreView:
+    """LibreView API stand-in for a set of accounts.
+
+    Each group of shared consecutive accounts follows the same patients, by
+    default every account follows its own. Every request waits latency
+    seconds, then fails with a 500 with probability error_rate or with a 429
+    with probability rate_limit_rate. Tokens last token_lifetime seconds and
+    a new ticket is handed out once half of it has elapsed.
+    """
+
+    def __init__(
+        self,
+        accounts: int = 1,
+        patients: int = 1,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        token_lifetime: float = 3600.0,
+        seed: int = 0,
+        shared: int = 1,
+    ) -> None:
+        """Initialize the server, it is started by async_start."""
+        self.accounts = accounts
+        self.patients = patients
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+        self.shared = shared
+        self.requests: Counter[str] = Counter()
+        self.responses: Counter[int] = Counter()
+        self.logins = 0
+        self.reading_time = int(time.time()) // 60 * 60 - 86400
+        self._random = random.Random(seed)
+        self._tokens: dict[str, tuple[int, float]] = {}
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def advance(self, seconds: int = 60) -> None:
+        """Move the reading clock forward."""
+        self.reading_time += seconds
+
+    def patient_ids(self, account: int) -> list[str]:
+        """Return the patients followed by an account."""
+        group = account // self.shared
+        return [f"patient-{group}-{index}" for index in range(self.patients)]
+
+    async def async_start(self, port: int = 0) -> str:
+        """Serve on a local port, a free one by default, and return the base URL."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(LOGIN_URL, self._login)
+        app.router.add_get(CONNECTION_URL, self._connections)
+        app.router.add_get(GRAPH_URL.format(patient_id="{patient_id}"), self._graph)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests[request.match_info.route.resource.canonical] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        draw = self._random.random()
+        if draw < self.error_rate:
+            response = web.Response(status=500)
+        elif draw < self.error_rate + self.rate_limit_rate:
+            response = web.Response(
+                status=429, headers={"Retry-After": str(self.retry_after)}
+            )
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPException as e:
+                self.responses[e.status] += 1
+                raise
+        self.responses[response.status] += 1
+        return response
+
+    def _issue_ticket(self, account: int) -> dict:
+        now = time.time()
+        self._tokens = {
+            token: entry for token, entry in self._tokens.items() if entry[1] > now
+        }
+        token = secrets.token_hex(16)
+        expires = now + self.token_lifetime
+        self._tokens[token] = (account, expires)
+        return {"token": token, "expires": int(expires), "duration": 0}
+
+    def _authenticate(self, request: web.Request) -> tuple[int, dict]:
+        """Return the account of a request and the ticket to hand back."""
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        account, expires = self._tokens.get(token, (None, 0.0))
+        if account is None or expires <= time.time():
+            raise web.HTTPUnauthorized()
+        if expires - time.time() < self.token_lifetime / 2:
+            return account, self._issue_ticket(account)
+        return account, {"token": token, "expires": int(expires), "duration": 0}
+
+    async def _login(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        account = next(
+            (i for i in range(self.accounts) if username(i) == body.get("email")),
+            None,
+        )
+        if account is None or body.get("password") != PASSWORD:
+            return web.json_response({"status": 2, "error": {"message": "Invalid"}})
+        self.logins += 1
+        return web.json_response(
+            {
+                "status": 0,
+                "data": {
+                    "user": {"id": f"user-{account}"},
+                    "authTicket": self._issue_ticket(account),
+                },
+            }
+        )
+
+    async def _connections(self, request: web.Request) -> web.Response:
+        account, ticket = self._authenticate(request)
+        return web.json_response(
+            {
+                "status": 0,
+                "data": [self._connection(pid) for pid in self.patient_ids(account)],
+                "ticket": ticket,
+            }
+        )
+
+    async def _graph(self, request: web.Request) -> web.Response:
+        account, ticket = self._authenticate(request)
+        patient_id = request.match_info["patient_id"]
+        if patient_id not in self.patient_ids(account):
+            raise web.HTTPNotFound()
+        start = self.reading_time - GRAPH_HOURS * 3600
+        return web.json_response(
+            {
+                "status": 0,
+                "data": {
+                    "connection": self._connection(patient_id),
+                    "activeSensors": [],
+                    "graphData": [
+                        self._reading(patient_id, epoch)
+                        for epoch in range(
+                            start, self.reading_time, GRAPH_INTERVAL_SECONDS
+                        )
+                    ],
+                },
+                "ticket": ticket,
+            }
+        )
+
+    def _connection(self, patient_id: str) -> dict:
+        return connection(patient_id, self._reading(patient_id, self.reading_time))
+
+    @staticmethod
+    def _reading(patient_id: str, epoch: int) -> dict:
+        phase = zlib.crc32(patient_id.encode()) % 360
+        value = int(130 + 70 * math.sin(math.radians(epoch / 60 + phase)))
+        return reading(epoch, value)
+
+
+async def main(accounts: int, patients: int, port: int) -> None:
+    """Serve the stand-in until interrupted, advancing readings every minute."""
+    server = FakeLibreView(accounts, patients)
+    print(f"Serving {accounts} accounts on {await server.async_start(port)}")
+    print(f"Log in as {username(0)} with password {PASSWORD!r}")
+    try:
+        while True:
+            await asyncio.sleep(60)
+            server.advance()
+    finally:
+        await server.async_stop()
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:4]]
+    asyncio.run(main(*arguments, *(1, 1, 8080)[len(arguments) :]))
@@ -0,0 +1,56 @@
+"""Synthetic LibreView payloads shared by the benchmarks."""
+
+from __future__ import annotations
+
+import time
+
+FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+def timestamp(epoch: float) -> str:
+    """Return a LibreView timestamp, without leading zeros, of a UTC epoch."""
+    moment = time.gmtime(epoch)
+    return time.strftime(FORMAT, moment).lstrip("0").replace("/0", "/")
+
+
+def reading(epoch: float, value: int) -> dict:
+    """Return a glucose reading taken at epoch."""
+    stamp = timestamp(epoch)
+    return {
+        "FactoryTimestamp": stamp,
+        "Timestamp": stamp,
+        "type": 1,
+        "ValueInMgPerDl": value,
+        "TrendArrow": 3,
+        "MeasurementColor": 1,
+        "GlucoseUnits": 1,
+        "Value": value,
+        "isHigh": value > 180,
+        "isLow": value < 70,
+    }
+
+
+def connection(patient_id: str, last_reading: dict) -> dict:
+    """Return the connection of a patient, as in the connections payload."""
+    return {
+        "id": f"connection-{patient_id}",
+        "patientId": patient_id,
+        "country": "FR",
+        "status": 2,
+        "firstName": "First",
+        "lastName": patient_id,
+        "targetLow": 70,
+        "targetHigh": 180,
+        "uom": 1,
+        "sensor": {
+            "deviceId": "",
+            "sn": f"SN-{patient_id}",
+            "a": 1706700000,
+            "pt": 4,
+        },
+        "alarmRules": {"h": {"th": 180}, "l": {"th": 70}, "std": {}},
+        "glucoseMeasurement": last_reading,
+        "glucoseItem": last_reading,
+        "patientDevice": {"did": f"device-{patient_id}", "alarms": False},
+        "created": 1700000000,
+    }
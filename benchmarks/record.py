@@ -0,0 +1,91 @@
+"""Record LibreLinkUp traffic into a capture file for benchmarks.replay.
+
+Logs in, fetches the graph and logbook of every patient once, then polls the
+connections every minute, recording each exchange through TrafficCapture.
+Credentials, tokens, names and identifiers are scrubbed while recording.
+
+Run from the repository root with the development requirements installed,
+against LibreView:
+
+    python -m benchmarks.record capture.ndjson.gz --username ... --password ...
+
+or against the local stand-in, whose readings are advanced instead of waited
+for, to produce a synthetic week in a few seconds:
+
+    python -m benchmarks.record capture.ndjson.gz --fake --minutes 10080
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from custom_components.librelink.api import (
+    LibreLinkAPI,
+    LibreLinkAPIError,
+    LibreLinkTransport,
+)
+from custom_components.librelink.capture import TrafficCapture
+from custom_components.librelink.const import BASE_URL_LIST
+from custom_components.librelink.ratelimit import get_region_limiter
+
+from .fake_libreview import PASSWORD, FakeLibreView, username
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Record the capture."""
+    logging.basicConfig(level=logging.WARNING)
+    server = None
+    if args.fake:
+        server = FakeLibreView(patients=args.patients)
+        args.url = await server.async_start()
+        args.username, args.password = username(0), PASSWORD
+        # Readings are not waited for, neither should the region limiter be.
+        limiter = get_region_limiter(args.url)
+        limiter.rate = limiter.burst = 1e6
+
+    transport = LibreLinkTransport()
+    api = LibreLinkAPI(base_url=args.url, transport=transport)
+    api.capture = TrafficCapture(args.output)
+    if server:
+        api.capture.clock = lambda: server.reading_time
+
+    try:
+        await api.async_login(args.username, args.password)
+        patients = await api.async_get_data()
+        for patient in patients:
+            await api.async_get_graph(patient.id)
+            if not server:
+                await api.async_get_logbook(patient.id)
+
+        for minute in range(1, args.minutes):
+            if server:
+                server.advance()
+            else:
+                await asyncio.sleep(60)
+            try:
+                if not api.token_valid:
+                    await api.async_login(args.username, args.password)
+                await api.async_get_data()
+            except LibreLinkAPIError as e:
+                logging.warning("Poll %s failed: %s", minute, e)
+    finally:
+        api.capture.close()
+        await transport.async_close()
+        if server:
+            await server.async_stop()
+
+    print(f"Recorded {api.capture.exchanges} exchanges into {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--url", default=BASE_URL_LIST["Global"])
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--patients", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
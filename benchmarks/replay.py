@@ -0,0 +1,164 @@
+"""Replay a LibreLinkUp capture through the coordinator and the entities.
+
+The exchanges recorded by benchmarks.record are answered in place of the
+API, below the parsing of LibreLinkAPI, following a virtual clock that runs
+--speed times faster than the recording. Every recorded poll refreshes the
+coordinator, whose sensor and binary sensor entities write their states to a
+bare Home Assistant core. A week of readings goes through in minutes at
+1000x, or in seconds with --speed 0, which does not wait at all.
+
+Reports the CPU time of the update pipeline and the state writes, skipped
+writes and state changes, to compare between revisions.
+
+Run from the repository root with the development requirements installed:
+
+    python -m benchmarks.replay capture.ndjson.gz [--speed 1000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import logging
+import tempfile
+import time
+from types import SimpleNamespace
+
+from homeassistant.const import (
+    CONF_UNIT_OF_MEASUREMENT,
+    CONF_USERNAME,
+    EVENT_STATE_CHANGED,
+)
+from homeassistant.core import HomeAssistant, callback
+
+from custom_components.librelink import binary_sensor, sensor
+from custom_components.librelink.api import LibreLinkAPI, LibreLinkAPIConnectionError
+from custom_components.librelink.capture import read_capture
+from custom_components.librelink.const import CONF_PATIENT_ID, CONNECTION_URL, DOMAIN
+from custom_components.librelink.coordinator import LibreLinkDataUpdateCoordinator
+from custom_components.librelink.units import UNITS_OF_MEASUREMENT
+
+
+class VirtualClock:
+    """Clock following the recording, speed times faster than real time."""
+
+    def __init__(self, start: float, speed: float) -> None:
+        """Initialize the clock at start."""
+        self.now = start
+        self.speed = speed
+
+    async def advance_to(self, moment: float) -> None:
+        """Wait for the clock to reach moment."""
+        if self.speed and moment > self.now:
+            await asyncio.sleep((moment - self.now) / self.speed)
+        self.now = max(self.now, moment)
+
+
+class ReplayAPI(LibreLinkAPI):
+    """LibreLinkAPI answering from a capture instead of the network.
+
+    Each request gets the latest recorded answer of its URL at the time of
+    the clock, then goes through the usual parsing.
+    """
+
+    def __init__(self, exchanges: list[dict], clock: VirtualClock) -> None:
+        """Initialize from the exchanges of a capture."""
+        super().__init__(base_url="")
+        self.clock = clock
+        self._times: dict[str, list[float]] = {}
+        self._responses: dict[str, list[dict]] = {}
+        for exchange in exchanges:
+            self._times.setdefault(exchange["url"], []).append(exchange["t"])
+            self._responses.setdefault(exchange["url"], []).append(
+                exchange["response"]
+            )
+
+    async def _call_api(
+        self,
+        url: str,
+        data: dict | None = None,
+        authenticated: bool = True,
+    ) -> any:
+        index = bisect.bisect_right(self._times.get(url, []), self.clock.now)
+        if not index:
+            raise LibreLinkAPIConnectionError(f"No recorded answer for {url}")
+        return self._responses[url][index - 1]
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Replay the capture."""
+    logging.disable(logging.CRITICAL)
+    exchanges = read_capture(args.capture)
+    polls = [e["t"] for e in exchanges if e["url"] == CONNECTION_URL]
+    if not polls:
+        raise SystemExit(f"No connections poll in {args.capture}")
+
+    clock = VirtualClock(polls[0], args.speed)
+    api = ReplayAPI(exchanges, clock)
+    api.set_ticket({"token": "replay"})
+    patient_ids = [p.id for p in await api.async_get_data()]
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    coordinator = LibreLinkDataUpdateCoordinator(
+        hass=hass, api=api, patient_id=patient_ids[0], adaptive_polling=False
+    )
+    for patient_id in patient_ids[1:]:
+        coordinator.register_patient(patient_id)
+    await coordinator.async_refresh()
+    hass.data[DOMAIN] = {"replay": coordinator}
+
+    entities = []
+    for patient_id in patient_ids:
+        entry = SimpleNamespace(
+            data={
+                CONF_USERNAME: "replay",
+                CONF_PATIENT_ID: patient_id,
+                CONF_UNIT_OF_MEASUREMENT: UNITS_OF_MEASUREMENT[0].unit_of_measurement,
+            }
+        )
+        for platform in (sensor, binary_sensor):
+            await platform.async_setup_entry(hass, entry, entities.extend)
+    for index, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.librelink_replay_{index}"
+        entity.async_write_ha_state()
+        coordinator.async_add_listener(entity._handle_coordinator_update)
+
+    changes = 0
+
+    @callback
+    def _count_change(event) -> None:
+        nonlocal changes
+        changes += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _count_change)
+    coordinator.state_writes = coordinator.skipped_state_writes = 0
+
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for moment in polls[1:]:
+        await clock.advance_to(moment)
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+
+    span = (polls[-1] - polls[0]) / 3600
+    print(
+        f"{len(polls) - 1} polls of {len(patient_ids)} patients over {span:.1f} "
+        f"hours, {len(entities)} entities, replayed in {elapsed:.1f} s"
+    )
+    print(
+        f"CPU {cpu:.2f} s, {cpu / max(len(polls) - 1, 1) * 1e3:.2f} ms per poll, "
+        f"{coordinator.state_writes} state writes, "
+        f"{coordinator.skipped_state_writes} skipped, {changes} state changes"
+    )
+    await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture")
+    parser.add_argument("--speed", type=float, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
+import contextlib
+import os
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME, Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.exceptions import ConfigEntryNotReady
 
-from .api import LibreLinkAPI
+from .auth import (
+    async_get_auth_manager,
+    async_remove_account_data,
+    async_remove_auth_manager,
+)
 from .const import CONF_PATIENT_ID, DOMAIN, LOGGER
-from .coordinator import LibreLinkDataUpdateCoordinator
+from .coordinator import LibreLinkDataUpdateCoordinator, history_path
 
 PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.SENSOR]
 
@@ -29,38 +36,119 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     domain_data = hass.data.setdefault(DOMAIN, {})
 
-    if username not in domain_data:
-        # Using the declared API for login based on patient credentials to retreive the bearer Token
-        api = LibreLinkAPI(
-            base_url=base_url,
-            session=async_get_clientsession(hass),
-        )
-
-        # Then getting the token.
-        await api.async_login(username=username, password=password)
-
-        coordinator = LibreLinkDataUpdateCoordinator(
-            hass=hass, api=api, patient_id=patient_id
-        )
-
-        # First poll of the data to be ready for entities initialization
-        await coordinator.async_config_entry_first_refresh()
-
-        domain_data[username] = coordinator
-    else:
-        coordinator: LibreLinkDataUpdateCoordinator = domain_data[username]
-        coordinator.register_patient(patient_id)
+    # The account API and its token are shared with the config flow and the
+    # other entries of the same username.
+    auth = async_get_auth_manager(hass, base_url, username, password)
+
+    # Entries of the same account set up concurrently wait for the first one
+    # to create the coordinator instead of logging in on their own.
+    async with auth.setup_lock:
+        if username not in domain_data:
+            coordinator = LibreLinkDataUpdateCoordinator(
+                hass=hass, api=auth.api, patient_id=patient_id, auth=auth
+            )
+
+            # Start from the data persisted before the restart, if any, while
+            # the login and the first poll run in the background.
+            coordinator.restore(await auth.async_restore())
+            if patient_id in coordinator.data:
+                entry.async_create_background_task(
+                    hass, coordinator.async_refresh(), f"{DOMAIN} refresh {username}"
+                )
+            else:
+                try:
+                    # Getting the token, unless the config flow just did.
+                    await auth.async_login()
+
+                    # First poll of the data to be ready for entities initialization
+                    await coordinator.async_config_entry_first_refresh()
+                    # Restored data of other patients is served while
+                    # LibreView fails.
+                    if patient_id not in coordinator.data:
+                        raise ConfigEntryNotReady(f"No data for patient {patient_id}")
+                except BaseException:
+                    # Leave the patient registry as it was for the retry.
+                    coordinator.unregister_patient(patient_id)
+                    raise
+
+            domain_data[username] = coordinator
+        else:
+            coordinator: LibreLinkDataUpdateCoordinator = domain_data[username]
+            coordinator.register_patient(patient_id)
+            if patient_id not in coordinator.data:
+                await coordinator.async_refresh()
+            if patient_id not in coordinator.data:
+                coordinator.unregister_patient(patient_id)
+                raise ConfigEntryNotReady(f"No data for patient {patient_id}")
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     # Then launch async_setup_entry for our declared entities in sensor.py and binary_sensor.py
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entries of an account whose password changed."""
+    username = entry.data[CONF_USERNAME]
+    password = entry.data[CONF_PASSWORD]
+    coordinator = hass.data.get(DOMAIN, {}).get(username)
+    if coordinator is None or coordinator.auth.password == password:
+        return
+
+    # The coordinator and its manager are shared by the entries of the
+    # account: all of them are unloaded before any is set up again.
+    entries = [
+        other
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.data[CONF_USERNAME] == username
+    ]
+    loaded = [other for other in entries if other.state is ConfigEntryState.LOADED]
+    for other in loaded:
+        await hass.config_entries.async_unload(other.entry_id)
+    # Unloaded entries no longer listen to their updates.
+    for other in entries:
+        if other.data[CONF_PASSWORD] != password:
+            hass.config_entries.async_update_entry(
+                other, data={**other.data, CONF_PASSWORD: password}
+            )
+    for other in loaded:
+        await hass.config_entries.async_setup(other.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        coordinator: LibreLinkDataUpdateCoordinator = hass.data[DOMAIN][CONF_USERNAME]
+        username = entry.data[CONF_USERNAME]
+        coordinator: LibreLinkDataUpdateCoordinator = hass.data[DOMAIN][username]
         coordinator.unregister_patient(entry.data[CONF_PATIENT_ID])
         if coordinator.tracked_patients == 0:
-            hass.data[DOMAIN].pop(CONF_USERNAME)
+            hass.data[DOMAIN].pop(username)
+            async_remove_auth_manager(hass, username)
     return unloaded
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the history of the patient, and the account data with its last entry."""
+    username = entry.data[CONF_USERNAME]
+    patient_id = entry.data[CONF_PATIENT_ID]
+    if not any(
+        other.data[CONF_PATIENT_ID] == patient_id
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        path = history_path(hass, patient_id)
+
+        def _remove() -> None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+        await hass.async_add_executor_job(_remove)
+
+    if any(
+        other.data[CONF_USERNAME] == username
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        return
+
+    async_remove_auth_manager(hass, username)
+    await async_remove_account_data(hass, username)
@@ -2,29 +2,72 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+import asyncio
+from collections.abc import Awaitable, Callable, Collection, Iterable
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
-
+from email.utils import parsedate_to_datetime
+import json
+import logging
+import random
 import socket
+import time
+from typing import TYPE_CHECKING
+
 import aiohttp
 
 from .const import (
+    API_BACKOFF_SECONDS,
+    API_MAX_RETRIES,
     API_TIME_OUT_SECONDS,
     CONNECTION_URL,
+    GRAPH_URL,
+    LOGBOOK_URL,
     LOGGER,
     LOGIN_URL,
     PRODUCT,
+    REGION_URL,
+    STATISTICS_GAP_SECONDS,
+    TOKEN_EXPIRY_MARGIN_SECONDS,
+    TRANSPORT_CONNECTIONS_PER_HOST,
+    TRANSPORT_DNS_CACHE_SECONDS,
+    TRANSPORT_KEEPALIVE_SECONDS,
     VERSION_APP,
 )
+from .capture import TrafficCapture
+from .history import GlucoseHistory
+from .instrumentation import SIZE_BUCKETS, Instrumentation
+from .ratelimit import get_region_limiter
+from .timestamps import parse_timestamp, parse_timestamps_to_epoch
 
-@dataclass
+if TYPE_CHECKING:
+    from .historyfile import MappedGlucoseHistory
+
+try:
+    import orjson
+except ImportError:
+    json_loads = json.loads
+else:
+    json_loads = orjson.loads
+
+try:
+    import brotli  # noqa: F401 pylint: disable=unused-import
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+else:
+    ACCEPT_ENCODING = "gzip, deflate, br"
+
+_TIMEOUT = aiohttp.ClientTimeout(total=API_TIME_OUT_SECONDS)
+
+@dataclass(frozen=True, slots=True)
 class Target:
     """Target Glucose data."""
 
     high: int
     low: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Measurement:
     """Measurement data."""
 
@@ -32,7 +75,7 @@ class Measurement:
     timestamp: datetime
     trend: int
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LibreLinkDevice:
     """LibreLink device data."""
 
@@ -44,7 +87,15 @@ class LibreLinkDevice:
         """Return the expiration timestamp of the sensor."""
         return self.application_timestamp + timedelta(days=14)
 
-@dataclass
+    @classmethod
+    def from_api_response_data(cls, data):
+        """Create a LibreLinkDevice object from the API sensor data."""
+        return cls(
+            serial_number=f"{data['pt']}{data['sn']}",
+            application_timestamp=datetime.fromtimestamp(data["a"], tz=UTC),
+        )
+
+@dataclass(frozen=True, slots=True)
 class Patient:
     """Patient data."""
 
@@ -53,13 +104,24 @@ class Patient:
     last_name: str
     measurement: Measurement
     target: Target
-    device: LibreLinkDevice
+    sensor_data: dict = field(repr=False, compare=False)
+    _device: LibreLinkDevice | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def name(self):
         """Return the full name of the patient."""
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def device(self) -> LibreLinkDevice:
+        """Return the sensor device, decoded on first access."""
+        if self._device is None:
+            device = LibreLinkDevice.from_api_response_data(self.sensor_data)
+            object.__setattr__(self, "_device", device)
+        return self._device
+
     @classmethod
     def from_api_response_data(cls, data):
         """Create a Patient object from the API response data."""
@@ -69,24 +131,27 @@ class Patient:
             last_name=data["lastName"],
             measurement=Measurement(
                 value=data["glucoseMeasurement"]["ValueInMgPerDl"],
-                timestamp=datetime.strptime(
-                    data["glucoseMeasurement"]["FactoryTimestamp"],
-                    "%m/%d/%Y %I:%M:%S %p",
-                ).replace(tzinfo=UTC),
+                timestamp=parse_timestamp(
+                    data["glucoseMeasurement"]["FactoryTimestamp"]
+                ),
                 trend=data["glucoseMeasurement"]["TrendArrow"],
             ),
             target=Target(
                 high=data["targetHigh"],
                 low=data["targetLow"],
             ),
-            device=LibreLinkDevice(
-                serial_number=f'{data["sensor"]["pt"]}{data['sensor']['sn']}',
-                application_timestamp=datetime.fromtimestamp(
-                    data["sensor"]["a"], tz=UTC
-                ),
-            ),
+            sensor_data=data["sensor"],
         )
 
+def _parse_readings(points: Iterable[dict]) -> tuple[array, array, array]:
+    """Parse API glucose readings into timestamp, value and trend arrays."""
+    points = list(points)
+    return (
+        parse_timestamps_to_epoch(point["FactoryTimestamp"] for point in points),
+        array("H", (int(point["ValueInMgPerDl"]) for point in points)),
+        array("b", (point.get("TrendArrow", 0) for point in points)),
+    )
+
 class LibreLinkAPIError(Exception):
     """Base class for exceptions in this module."""
 
@@ -104,46 +169,295 @@ class LibreLinkAPIConnectionError(LibreLinkAPIError):
         """Initialize the API error."""
         super().__init__(message or "Connection error")
 
+class LibreLinkAPIRateLimitError(LibreLinkAPIConnectionError):
+    """Exception raised when the API rate limits the requests."""
+
+    def __init__(self, retry_after: float | None = None) -> None:
+        """Initialize the API error."""
+        super().__init__("Too many requests")
+        self.retry_after = retry_after
+
+@dataclass
+class RequestTimings:
+    """Request timings in seconds, DNS and connect are None on reused connections."""
+
+    dns: float | None
+    connect: float | None
+    ttfb: float | None
+    total: float
+
+class LibreLinkTransport:
+    """Pooled HTTP transport dedicated to the LibreLink API.
+
+    Connections are kept alive between polls, DNS answers are cached and
+    compressed responses are negotiated. Timings of each request are traced.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the transport, the session is created on first use."""
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session."""
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(_trace_start("request"))
+            trace.on_dns_resolvehost_start.append(_trace_start("dns"))
+            trace.on_dns_resolvehost_end.append(_trace_end("dns"))
+            trace.on_connection_create_start.append(_trace_start("connect"))
+            trace.on_connection_create_end.append(_trace_end("connect"))
+            trace.on_request_end.append(_trace_end("ttfb"))
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=TRANSPORT_CONNECTIONS_PER_HOST,
+                    keepalive_timeout=TRANSPORT_KEEPALIVE_SECONDS,
+                    ttl_dns_cache=TRANSPORT_DNS_CACHE_SECONDS,
+                ),
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+                timeout=_TIMEOUT,
+                trace_configs=[trace],
+            )
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+def _trace_start(name: str):
+    async def on_start(session, context, params) -> None:
+        context.trace_request_ctx[name] = time.perf_counter()
+
+    return on_start
+
+def _trace_end(name: str):
+    async def on_end(session, context, params) -> None:
+        timings = context.trace_request_ctx
+        timings[name] = time.perf_counter() - timings.pop(name, timings["request"])
+
+    return on_end
+
+_TRANSPORTS: dict[str, LibreLinkTransport] = {}
+
+def get_region_transport(base_url: str) -> LibreLinkTransport:
+    """Return the transport shared by the accounts of a region."""
+    if base_url not in _TRANSPORTS:
+        _TRANSPORTS[base_url] = LibreLinkTransport()
+    return _TRANSPORTS[base_url]
+
+async def async_close_transports() -> None:
+    """Close the transports of every region."""
+    for transport in _TRANSPORTS.values():
+        await transport.async_close()
+
 class LibreLinkAPI:
     """API class for communication with the LibreLink API."""
 
-    def __init__(self, base_url: str, session: aiohttp.ClientSession) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        base_url: str,
+        session: aiohttp.ClientSession | None = None,
+        transport: LibreLinkTransport | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        Requests go through the dedicated transport when given, otherwise
+        through session. Setting capture records every successful exchange.
+        Setting reauthenticate, called with the rejected token, lets requests
+        rejected with a 401 or 403 be replayed after a new login.
+        """
         self._token = None
+        self._token_expires: float | None = None
         self._session = session
+        self._transport = transport
+        self.last_timings: RequestTimings | None = None
+        self.capture: TrafficCapture | None = None
+        self.reauthenticate: Callable[[str | None], Awaitable[None]] | None = None
+        self.instrumentation = Instrumentation()
+        self.base_url = base_url
+        self.history: dict[str, GlucoseHistory | MappedGlucoseHistory] = {}
+        self.connections: dict[str, dict] = {}
+
+    @property
+    def token(self) -> str | None:
+        """Return the current authentication token."""
+        return self._token
+
+    @property
+    def token_expires(self) -> float | None:
+        """Return the epoch at which the current token expires, if known."""
+        return self._token_expires
+
+    @property
+    def token_valid(self) -> bool:
+        """Return whether a token is held and not about to expire."""
+        return self._token is not None and (
+            self._token_expires is None
+            or self._token_expires - TOKEN_EXPIRY_MARGIN_SECONDS > time.time()
+        )
+
+    def set_base_url(self, base_url: str) -> None:
+        """Send the requests to another regional host."""
         self.base_url = base_url
+        if self._transport:
+            self._transport = get_region_transport(base_url)
+
+    def set_ticket(self, ticket: dict) -> None:
+        """Use the token of an authentication ticket, unless it expires sooner."""
+        expires = ticket.get("expires")
+        if (
+            expires is not None
+            and self._token_expires is not None
+            and expires < self._token_expires
+        ):
+            return
+        self._token = ticket["token"]
+        self._token_expires = expires
+
+    async def async_get_data(self, patient_ids: Collection[str] | None = None):
+        """Get data from the API.
 
-    async def async_get_data(self):
-        """Get data from the API."""
+        When patient_ids is given, connections for other patients are skipped
+        before being parsed.
+        """
         response = await self._call_api(url=CONNECTION_URL)
         LOGGER.debug("Return API Status:%s ", response["status"])
         # API status return 0 if everything goes well.
         if response["status"] != 0:
             raise LibreLinkAPIConnectionError()
 
+        start = time.perf_counter()
+        self.connections = {
+            patient["patientId"]: patient
+            for patient in response["data"]
+            if patient_ids is None or patient["patientId"] in patient_ids
+        }
         patients = [
-            Patient.from_api_response_data(patient) for patient in response["data"]
+            Patient.from_api_response_data(patient)
+            for patient in self.connections.values()
         ]
+        self.instrumentation.record("parse", time.perf_counter() - start)
 
-        LOGGER.debug(
-            "Number of patients : %s and patient list %s", len(patients), patients
-        )
-        self._token = response["ticket"]["token"]
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(
+                "Number of patients : %s of %s and patient list %s",
+                len(patients),
+                len(response["data"]),
+                [patient.id for patient in patients],
+            )
+        self.set_ticket(response["ticket"])
 
         return patients
 
+    async def _async_get_graph_data(self, patient_id: str) -> dict:
+        """Get the connection and the recent readings of a patient."""
+        response = await self._call_api(url=GRAPH_URL.format(patient_id=patient_id))
+        LOGGER.debug("Return API Status:%s ", response["status"])
+        if response["status"] != 0:
+            raise LibreLinkAPIConnectionError()
+
+        self.set_ticket(response["ticket"])
+        data = response["data"]
+        data["graphData"].append(data["connection"]["glucoseMeasurement"])
+        return data
+
+    async def async_get_graph(self, patient_id: str) -> tuple[array, array, array]:
+        """Get the recent readings of a patient from the graph endpoint.
+
+        Readings are returned as timestamp, value and trend arrays.
+        """
+        data = await self._async_get_graph_data(patient_id)
+        return _parse_readings(data["graphData"])
+
+    async def async_get_logbook(self, patient_id: str) -> tuple[array, array, array]:
+        """Get the logged readings of a patient from the logbook endpoint.
+
+        Readings are returned as timestamp, value and trend arrays.
+        """
+        response = await self._call_api(
+            url=LOGBOOK_URL.format(patient_id=patient_id)
+        )
+        LOGGER.debug("Return API Status:%s ", response["status"])
+        if response["status"] != 0:
+            raise LibreLinkAPIConnectionError()
+
+        self.set_ticket(response["ticket"])
+
+        return _parse_readings(
+            entry for entry in response["data"] if "ValueInMgPerDl" in entry
+        )
+
+    async def async_update_history(
+        self, patient_id: str
+    ) -> GlucoseHistory | MappedGlucoseHistory:
+        """Merge the graph readings of a patient into its history."""
+        readings = await self.async_get_graph(patient_id)
+        history = self.history.setdefault(patient_id, GlucoseHistory())
+        added = history.merge(*readings)
+        LOGGER.debug("Merged %s readings into history of %s", added, patient_id)
+
+        return history
+
+    async def async_sync_history(self, patient: Patient) -> int:
+        """Bring the history of a patient up to its latest polled reading.
+
+        The reading is appended when it directly follows the last one stored.
+        The graph endpoint is only fetched when readings are missing in
+        between, or when there is no history yet, and its readings newer
+        than the stored ones are merged along with the latest one. Return
+        how many readings were added.
+        """
+        measurement = patient.measurement
+        reading = int(measurement.timestamp.timestamp())
+        history = self.history.get(patient.id)
+        last = history.last_timestamp if history is not None else None
+        if last is not None and reading - last <= STATISTICS_GAP_SECONDS:
+            # Counted against fetching the graph on every poll.
+            self.instrumentation.count("graph_requests_saved")
+            if size := self.instrumentation.histograms.get("payload_graph"):
+                self.instrumentation.count(
+                    "graph_bytes_saved", round(size.total / size.count)
+                )
+            return int(history.append(reading, measurement.value, measurement.trend))
+
+        before = history.total if history is not None else 0
+        history = await self.async_update_history(patient.id)
+        return history.total - before
+
     async def async_login(self, username: str, password: str) -> str:
-        """Get token from the API."""
+        """Get token from the API.
+
+        When LibreView answers with a redirect to the home region of the
+        account, the login is sent again there and the API switches to it.
+        """
+        start = time.perf_counter()
         response = await self._call_api(
             url=LOGIN_URL,
             data={"email": username, "password": password},
             authenticated=False,
         )
+        if response.get("data", {}).get("redirect"):
+            region = response["data"]["region"]
+            LOGGER.debug("Login redirected to region %s", region)
+            self.set_base_url(REGION_URL.format(region=region))
+            response = await self._call_api(
+                url=LOGIN_URL,
+                data={"email": username, "password": password},
+                authenticated=False,
+            )
+            if response.get("data", {}).get("redirect"):
+                raise LibreLinkAPIConnectionError("Login redirected again")
+
         LOGGER.debug("Login status : %s", response["status"])
         if response["status"] == 2:
             raise LibreLinkAPIAuthenticationError()
 
-        self._token = response["data"]["authTicket"]["token"]
+        # A new login always replaces the ticket, whatever its expiry.
+        self._token_expires = None
+        self.set_ticket(response["data"]["authTicket"])
+        self.instrumentation.record("login", time.perf_counter() - start)
 
     async def _call_api(
         self,
@@ -151,7 +465,46 @@ class LibreLinkAPI:
         data: dict | None = None,
         authenticated: bool = True,
     ) -> any:
-        """Get information from the API."""
+        """Get information from the API.
+
+        Rate limited requests are retried with backoff. A rejected token is
+        renewed once through reauthenticate, then the request is replayed.
+        """
+        attempt = 0
+        reauthenticated = False
+        while True:
+            limiter = get_region_limiter(self.base_url)
+            await limiter.acquire()
+            token = self._token
+            try:
+                response = await self._request(url, data, authenticated)
+            except LibreLinkAPIRateLimitError as e:
+                backoff = API_BACKOFF_SECONDS * 2**attempt * random.uniform(0.5, 1.5)
+                # Also slows down the next callers once the retries run out.
+                limiter.throttle(e.retry_after or backoff)
+                if attempt == API_MAX_RETRIES:
+                    raise
+                attempt += 1
+                LOGGER.debug("Rate limited, retrying %s in %ss", url, backoff)
+                await asyncio.sleep(backoff)
+            except LibreLinkAPIAuthenticationError:
+                if not authenticated or reauthenticated or not self.reauthenticate:
+                    raise
+                reauthenticated = True
+                LOGGER.debug("Token rejected, logging in before retrying %s", url)
+                await self.reauthenticate(token)
+            else:
+                if self.capture:
+                    self.capture.record(url, data, response)
+                return response
+
+    async def _request(
+        self,
+        url: str,
+        data: dict | None,
+        authenticated: bool,
+    ) -> any:
+        """Send a single request to the API."""
         headers = {
             "product": PRODUCT,
             "version": VERSION_APP,
@@ -159,22 +512,71 @@ class LibreLinkAPI:
         if authenticated:
             headers["Authorization"] = "Bearer " + self._token
 
-        call_method = self._session.post if data else self._session.get
+        session = self._transport.session if self._transport else self._session
+        self.instrumentation.count("requests")
+        call_method = session.post if data else session.get
+        timings = {}
+        start = time.perf_counter()
         try:
-            response = await call_method(
+            # Leaving the context releases the connection to the pool, on
+            # error answers too.
+            async with call_method(
                 url=self.base_url + url,
                 headers=headers,
                 json=data,
-                timeout=aiohttp.ClientTimeout(total=API_TIME_OUT_SECONDS),
+                timeout=_TIMEOUT,
+                trace_request_ctx=timings,
+            ) as response:
+                LOGGER.debug("response.status: %s", response.status)
+                if response.status in (401, 403):
+                    raise LibreLinkAPIAuthenticationError()
+                if response.status == 429:
+                    raise LibreLinkAPIRateLimitError(
+                        _retry_after(response.headers.get("Retry-After"))
+                    )
+                response.raise_for_status()
+                body = await response.read()
+            received = time.perf_counter()
+            result = json_loads(body)
+            self.last_timings = RequestTimings(
+                dns=timings.get("dns"),
+                connect=timings.get("connect"),
+                ttfb=timings.get("ttfb"),
+                total=received - start,
             )
-            LOGGER.debug("response.status: %s", response.status)
-            if response.status in (401, 403):
-                raise LibreLinkAPIAuthenticationError()
-            response.raise_for_status()
-            return await response.json()
+            self.instrumentation.record("http", received - start)
+            self.instrumentation.record("decode", time.perf_counter() - received)
+            self.instrumentation.record("payload", len(body), SIZE_BUCKETS)
+            self.instrumentation.record(
+                f"payload_{_endpoint(url)}", len(body), SIZE_BUCKETS
+            )
+            return result
+        except LibreLinkAPIError:
+            raise
         except TimeoutError as e:
             raise LibreLinkAPIConnectionError("Timeout Error") from e
         except (aiohttp.ClientError, socket.gaierror) as e:
             raise LibreLinkAPIConnectionError() from e
         except Exception as e:
             raise LibreLinkAPIError() from e
+
+
+def _endpoint(url: str) -> str:
+    """Return the name of the endpoint of a request path."""
+    if url == LOGIN_URL:
+        return "login"
+    if url == CONNECTION_URL:
+        return "connections"
+    return url.rsplit("/", 1)[-1]
+
+def _retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds of a Retry-After header."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
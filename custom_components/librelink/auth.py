@@ -0,0 +1,234 @@
+"""Per-account authentication for LibreLink."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+import time
+
+from homeassistant.const import CONF_URL, CONF_USERNAME, EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .api import (
+    LibreLinkAPI,
+    LibreLinkAPIError,
+    async_close_transports,
+    get_region_transport,
+)
+from .const import (
+    DATA_AUTH,
+    DOMAIN,
+    LOGGER,
+    STORAGE_SAVE_DELAY_SECONDS,
+    STORAGE_VERSION,
+    TOKEN_RENEWAL_MARGIN_SECONDS,
+    TOKEN_RENEWAL_RETRY_SECONDS,
+)
+
+
+class LibreLinkAuthManager:
+    """Share one logged in LibreLinkAPI between the users of an account.
+
+    The config flow, the config entries and their coordinator all go through
+    the same manager, so a token obtained by one of them is reused by the
+    others and only one login request is in flight at a time. The ticket and
+    the last patient data are persisted so that a restart can start from them.
+    When a login is redirected to another region, the config entries of the
+    account are updated to poll that region directly.
+
+    The ticket is renewed in the background before it expires, and a request
+    rejected for its token logs in again once and is replayed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: LibreLinkAPI,
+        username: str,
+        password: str,
+    ) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self.api = api
+        self.configured_url = api.base_url
+        self._cancel_renewal: Callable[[], None] | None = None
+        api.reauthenticate = self.async_login
+        self.username = username
+        self.password = password
+        self.setup_lock = asyncio.Lock()
+        self._login_lock = asyncio.Lock()
+        self._store = _account_store(hass, username)
+        self._save_pending = False
+
+    async def async_login(self, expired_token: str | None = None) -> None:
+        """Log in, unless a valid token other than expired_token is held."""
+        async with self._login_lock:
+            if self.api.token_valid and self.api.token != expired_token:
+                return
+            LOGGER.debug("Logging in %s", self.username)
+            base_url = self.api.base_url
+            await self.api.async_login(self.username, self.password)
+            if self.api.base_url != base_url:
+                self._async_update_entries()
+            self.async_save()
+            self._async_schedule_renewal()
+
+    @callback
+    def _async_schedule_renewal(self, delay: float | None = None) -> None:
+        """Plan the renewal of the ticket ahead of its expiry."""
+        self.async_cancel_renewal()
+        if delay is None:
+            if self.api.token_expires is None:
+                return
+            # Tickets shorter than the margin are renewed halfway instead of
+            # right away, which would log in again in a loop.
+            remaining = self.api.token_expires - time.time()
+            delay = max(remaining - TOKEN_RENEWAL_MARGIN_SECONDS, remaining / 2, 0)
+        self._cancel_renewal = async_call_later(self.hass, delay, self._async_renew)
+
+    @callback
+    def async_cancel_renewal(self) -> None:
+        """Cancel the planned renewal of the ticket."""
+        if self._cancel_renewal:
+            self._cancel_renewal()
+            self._cancel_renewal = None
+
+    @callback
+    def _async_renew(self, now: datetime) -> None:
+        self._cancel_renewal = None
+        self.hass.async_create_background_task(
+            self._async_renew_ticket(), f"{DOMAIN} ticket renewal {self.username}"
+        )
+
+    async def _async_renew_ticket(self) -> None:
+        """Renew the ticket, unless a poll extended it in the meantime."""
+        expires = self.api.token_expires
+        if (
+            expires is not None
+            and expires - TOKEN_RENEWAL_MARGIN_SECONDS > time.time()
+        ):
+            self._async_schedule_renewal()
+            return
+        try:
+            await self.async_login(expired_token=self.api.token)
+        except LibreLinkAPIError as e:
+            LOGGER.warning("Unable to renew the ticket of %s: %s", self.username, e)
+            self._async_schedule_renewal(TOKEN_RENEWAL_RETRY_SECONDS)
+
+    @callback
+    def _async_update_entries(self) -> None:
+        """Store the region the account was redirected to in its entries."""
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if (
+                entry.data[CONF_USERNAME] == self.username
+                and entry.data[CONF_URL] != self.api.base_url
+            ):
+                LOGGER.info("Moving %s to %s", entry.title, self.api.base_url)
+                self.hass.config_entries.async_update_entry(
+                    entry, data=entry.data | {CONF_URL: self.api.base_url}
+                )
+
+    async def async_restore(self) -> list[dict]:
+        """Reuse the persisted ticket and return the persisted patient data."""
+        data = await self._store.async_load() or {}
+        if data.get("base_url") != self.api.base_url:
+            return []
+        if self.api.token is None and data.get("ticket"):
+            self.api.set_ticket(data["ticket"])
+            self._async_schedule_renewal()
+        return data.get("patients", [])
+
+    @callback
+    def async_save(self) -> None:
+        """Persist the ticket and the last patient data, batching writes."""
+        # Delaying the save again would re-arm its timer, which polls would
+        # then keep pushing back: the pending save writes the latest data.
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(
+                self._data_to_save, STORAGE_SAVE_DELAY_SECONDS
+            )
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_pending = False
+        return {
+            "base_url": self.api.base_url,
+            "ticket": {"token": self.api.token, "expires": self.api.token_expires},
+            "patients": list(self.api.connections.values()),
+        }
+
+
+def _account_store(hass: HomeAssistant, username: str) -> Store[dict]:
+    """Return the store of the ticket and patient data of an account."""
+    return Store(
+        hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(username)}", private=True
+    )
+
+
+async def async_remove_account_data(hass: HomeAssistant, username: str) -> None:
+    """Remove the persisted data of an account."""
+    await _account_store(hass, username).async_remove()
+
+
+@callback
+def async_get_auth_manager(
+    hass: HomeAssistant, base_url: str, username: str, password: str
+) -> LibreLinkAuthManager:
+    """Return the authentication manager of an account, creating it if needed."""
+    if DATA_AUTH not in hass.data:
+
+        async def _async_close(event: Event) -> None:
+            await async_close_transports()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+
+    managers: dict[str, LibreLinkAuthManager] = hass.data.setdefault(DATA_AUTH, {})
+    manager = managers.get(username)
+    if (
+        manager is None
+        or manager.password != password
+        or base_url not in (manager.api.base_url, manager.configured_url)
+    ):
+        if manager is not None:
+            manager.async_cancel_renewal()
+        manager = managers[username] = LibreLinkAuthManager(
+            hass,
+            LibreLinkAPI(base_url=base_url, transport=get_region_transport(base_url)),
+            username,
+            password,
+        )
+    return manager
+
+
+@callback
+def async_remove_auth_manager(hass: HomeAssistant, username: str) -> None:
+    """Forget the authentication manager of an account."""
+    if manager := hass.data.get(DATA_AUTH, {}).pop(username, None):
+        manager.async_cancel_renewal()
+
+
+@callback
+def async_release_auth_manager(
+    hass: HomeAssistant, manager: LibreLinkAuthManager
+) -> None:
+    """Forget the manager of a finished config flow, unless an entry uses it.
+
+    When the flow replaced the manager of running entries, theirs is put
+    back.
+    """
+    coordinator = hass.data.get(DOMAIN, {}).get(manager.username)
+    if coordinator is not None and coordinator.auth is manager:
+        return
+
+    manager.async_cancel_renewal()
+    managers: dict[str, LibreLinkAuthManager] = hass.data.get(DATA_AUTH, {})
+    if managers.get(manager.username) is manager:
+        if coordinator is not None and coordinator.auth is not None:
+            managers[manager.username] = coordinator.auth
+        else:
+            del managers[manager.username]
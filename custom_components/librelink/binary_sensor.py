@@ -12,7 +12,7 @@ from homeassistant.const import CONF_USERNAME
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CONF_PATIENT_ID, DOMAIN
+from .const import CONF_PATIENT_ID, DOMAIN, PREDICTION_HORIZON_MIN
 from .coordinator import LibreLinkDataUpdateCoordinator
 from .sensor import LibreLinkSensorBase
 
@@ -32,24 +32,20 @@ async def async_setup_entry(
     sensors = [
         HighSensor(coordinator, pid),
         LowSensor(coordinator, pid),
+        PredictedHighSensor(coordinator, pid),
+        PredictedLowSensor(coordinator, pid),
     ]
     async_add_entities(sensors)
 
 class LibreLinkBinarySensor(LibreLinkSensorBase, BinarySensorEntity):
     """LibreLink Binary Sensor class."""
 
-    @property
-    def device_class(self) -> str:
-        """Return the class of this device."""
-        return BinarySensorDeviceClass.SAFETY
+    _attr_device_class = BinarySensorDeviceClass.SAFETY
 
 class HighSensor(LibreLinkBinarySensor):
     """High Sensor class."""
 
-    @property
-    def name(self) -> str:
-        """Return the name of the binary_sensor."""
-        return "High"
+    _attr_name = "High"
 
     @property
     def is_on(self) -> bool:
@@ -59,12 +55,37 @@ class HighSensor(LibreLinkBinarySensor):
 class LowSensor(LibreLinkBinarySensor):
     """Low Sensor class."""
 
-    @property
-    def name(self) -> str:
-        """Return the name of the binary_sensor."""
-        return "Low"
+    _attr_name = "Low"
 
     @property
     def is_on(self) -> bool:
         """Return true if the binary_sensor is on."""
         return self._data.measurement.value <= self._data.target.low
+
+class PredictedBinarySensor(LibreLinkBinarySensor):
+    """Predicted Binary Sensor class."""
+
+    @property
+    def available(self) -> bool:
+        """Return if the sensor data are available."""
+        return super().available and self.coordinator.forecast(self.id) is not None
+
+class PredictedHighSensor(PredictedBinarySensor):
+    """Predicted High Sensor class."""
+
+    _attr_name = f"Predicted High In {PREDICTION_HORIZON_MIN} Min"
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if the binary_sensor is on."""
+        return self.coordinator.forecast(self.id).value >= self._data.target.high
+
+class PredictedLowSensor(PredictedBinarySensor):
+    """Predicted Low Sensor class."""
+
+    _attr_name = f"Predicted Low In {PREDICTION_HORIZON_MIN} Min"
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if the binary_sensor is on."""
+        return self.coordinator.forecast(self.id).value <= self._data.target.low
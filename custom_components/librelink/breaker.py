@@ -0,0 +1,73 @@
+"""Circuit breaker for LibreLink."""
+
+from __future__ import annotations
+
+from enum import StrEnum
+import time
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_MAX_RESET_SECONDS,
+    BREAKER_RESET_SECONDS,
+)
+
+
+class BreakerState(StrEnum):
+    """Circuit breaker state."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop calling a failing API and probe it from time to time.
+
+    After failure_threshold consecutive failures the breaker opens and
+    requests are refused. Once the reset timeout has elapsed it is half-open
+    and lets one probe through: a success closes it, a failure opens it again
+    with a doubled timeout.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECONDS,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.trips = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the state of the breaker."""
+        if self._opened_at is None:
+            return BreakerState.CLOSED
+        if time.monotonic() - self._opened_at < self._timeout:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    @property
+    def _timeout(self) -> float:
+        return min(
+            self.reset_timeout * 2 ** max(self.trips - 1, 0), BREAKER_MAX_RESET_SECONDS
+        )
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the breaker when needed."""
+        self.failures += 1
+        if (
+            self._opened_at is not None
+            or self.failures >= self.failure_threshold
+        ):
+            self.trips += 1
+            self._opened_at = time.monotonic()
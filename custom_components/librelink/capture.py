@@ -0,0 +1,90 @@
+"""Capture of LibreLink API traffic for replay.
+
+Exchanges are appended to a gzip compressed file, one JSON object per line:
+``{"t": epoch, "url": url, "request": body, "response": body}``.
+Credentials and tokens are scrubbed, names are replaced by pseudonyms and
+identifiers of patients and devices by stable aliases, in the bodies and in
+the URLs, so a capture can be shared.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import gzip
+import json
+import time
+from typing import Any
+
+SCRUBBED = "scrubbed"
+# Keys whose values are secrets or personal data without use for a replay.
+_SECRET_KEYS = frozenset(
+    {"token", "email", "password", "phone", "dateOfBirth", "accountId", "user"}
+)
+# Keys whose values are names, replaced by pseudonyms.
+_NAME_KEYS = frozenset({"firstName", "lastName", "fullName"})
+# Keys whose values are identifiers, replaced by aliases kept across exchanges.
+_ID_KEYS = frozenset({"patientId", "id", "sn", "did", "deviceId"})
+
+
+class TrafficCapture:
+    """Append scrubbed API exchanges to a capture file."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        """Initialize the capture, appending to path, timed by clock."""
+        self.path = path
+        self.clock = clock
+        self.exchanges = 0
+        self._aliases: dict[str, str] = {}
+        self._file = gzip.open(path, "at", encoding="utf-8")
+
+    def record(self, url: str, request: dict | None, response: Any) -> None:
+        """Append an exchange."""
+        response = self._scrub(response)
+        url = "/".join(self._aliases.get(part, part) for part in url.split("/"))
+        self._file.write(
+            json.dumps(
+                {
+                    "t": self.clock(),
+                    "url": url,
+                    "request": self._scrub(request),
+                    "response": response,
+                },
+                separators=(",", ":"),
+            )
+        )
+        self._file.write("\n")
+        self.exchanges += 1
+
+    def close(self) -> None:
+        """Flush and close the capture file."""
+        self._file.close()
+
+    def _alias(self, value: Any, prefix: str) -> Any:
+        if not isinstance(value, str) or not value:
+            return value
+        if value not in self._aliases:
+            self._aliases[value] = f"{prefix}-{len(self._aliases)}"
+        return self._aliases[value]
+
+    def _scrub(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._scrub(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        scrubbed = {}
+        for key, item in value.items():
+            if key in _SECRET_KEYS:
+                scrubbed[key] = SCRUBBED
+            elif key in _NAME_KEYS:
+                scrubbed[key] = self._alias(item, "name")
+            elif key in _ID_KEYS:
+                scrubbed[key] = self._alias(item, "id")
+            else:
+                scrubbed[key] = self._scrub(item)
+        return scrubbed
+
+
+def read_capture(path: str) -> list[dict]:
+    """Return the exchanges of a capture file in recording order."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
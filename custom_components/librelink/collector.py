@@ -0,0 +1,309 @@
+"""Headless collector of LibreLinkUp readings for many accounts.
+
+Polls the accounts listed in a JSON config file with LibreLinkAPI, without
+Home Assistant, and streams the new readings of every followed patient to a
+SQLite database or a newline-delimited JSON file. Example config::
+
+    {
+        "accounts": [
+            {"username": "...", "password": "...", "region": "Global"},
+            {"username": "...", "password": "...", "url": "https://..."}
+        ],
+        "output": "readings.sqlite",
+        "concurrency": 20,
+        "interval": 60
+    }
+
+Run from the repository root:
+
+    python -m custom_components.librelink.collector config.json [--once]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+from dataclasses import dataclass
+import json
+import logging
+import random
+import signal
+import sqlite3
+import time
+
+from .api import (
+    LibreLinkAPI,
+    LibreLinkAPIAuthenticationError,
+    LibreLinkAPIError,
+    async_close_transports,
+    get_region_transport,
+)
+from .const import (
+    BASE_URL_LIST,
+    COLLECTOR_BATCH_SIZE,
+    COLLECTOR_CONCURRENCY,
+    COLLECTOR_FLUSH_SECONDS,
+    COLLECTOR_INTERVAL_SECONDS,
+    LOGGER,
+)
+from .ratelimit import get_region_limiter
+
+Reading = tuple[str, int, int, int]
+# Queued after the last reading to stop the writer.
+_STOP = None
+
+
+@dataclass(frozen=True, slots=True)
+class Account:
+    """Account to collect."""
+
+    username: str
+    password: str
+    base_url: str
+
+    @classmethod
+    def from_config(cls, data: dict) -> Account:
+        """Read an account from the config file."""
+        return cls(
+            username=data["username"],
+            password=data["password"],
+            base_url=data.get("url") or BASE_URL_LIST[data.get("region", "Global")],
+        )
+
+
+class SQLiteSink:
+    """Write readings to a SQLite table, one transaction per batch."""
+
+    def __init__(self, path: str) -> None:
+        """Open the database, creating the table if needed."""
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS readings ("
+            "patient_id TEXT NOT NULL, timestamp INTEGER NOT NULL, "
+            "value INTEGER NOT NULL, trend INTEGER NOT NULL, "
+            "PRIMARY KEY (patient_id, timestamp)) WITHOUT ROWID"
+        )
+
+    def write(self, readings: list[Reading]) -> None:
+        """Insert a batch of readings, ignoring the ones already stored."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO readings VALUES (?, ?, ?, ?)", readings
+            )
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+
+class NDJSONSink:
+    """Append readings to a newline-delimited JSON file, one write per batch."""
+
+    def __init__(self, path: str) -> None:
+        """Open the file for appending."""
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, readings: list[Reading]) -> None:
+        """Append a batch of readings."""
+        self._file.write(
+            "".join(
+                json.dumps(
+                    {"patient_id": p, "timestamp": t, "value": v, "trend": r},
+                    separators=(",", ":"),
+                )
+                + "\n"
+                for p, t, v, r in readings
+            )
+        )
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+
+class Collector:
+    """Poll accounts concurrently and batch their new readings into a sink.
+
+    At most concurrency polls are in flight. The first poll of each account
+    is delayed by a random share of the interval, so that hundreds of
+    accounts do not poll in step. The sink is written from the executor, so
+    a slow disk does not hold back the polls.
+    """
+
+    def __init__(
+        self,
+        accounts: list[Account],
+        sink: SQLiteSink | NDJSONSink,
+        concurrency: int = COLLECTOR_CONCURRENCY,
+        interval: float = COLLECTOR_INTERVAL_SECONDS,
+        batch_size: int = COLLECTOR_BATCH_SIZE,
+        flush_interval: float = COLLECTOR_FLUSH_SECONDS,
+    ) -> None:
+        """Initialize the collector."""
+        self.accounts = accounts
+        self.sink = sink
+        self.interval = interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.polls = 0
+        self.failed_polls = 0
+        self.written = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._queue: asyncio.Queue[Reading | None] = asyncio.Queue()
+        self._pending: list[Reading] = []
+        self._last_readings: dict[str, int] = {}
+
+    async def async_poll(self, api: LibreLinkAPI, account: Account) -> None:
+        """Poll an account once and queue the new readings."""
+        async with self._semaphore:
+            self.polls += 1
+            try:
+                if not api.token_valid:
+                    await api.async_login(account.username, account.password)
+                try:
+                    patients = await api.async_get_data()
+                except LibreLinkAPIAuthenticationError:
+                    await api.async_login(account.username, account.password)
+                    patients = await api.async_get_data()
+            except LibreLinkAPIError as e:
+                self.failed_polls += 1
+                LOGGER.warning("Poll of %s failed: %s", account.username, e)
+                return
+
+        for patient in patients:
+            timestamp = int(patient.measurement.timestamp.timestamp())
+            if timestamp > self._last_readings.get(patient.id, 0):
+                self._last_readings[patient.id] = timestamp
+                self._queue.put_nowait(
+                    (
+                        patient.id,
+                        timestamp,
+                        patient.measurement.value,
+                        patient.measurement.trend,
+                    )
+                )
+
+    @staticmethod
+    def _create_api(account: Account) -> LibreLinkAPI:
+        return LibreLinkAPI(
+            base_url=account.base_url, transport=get_region_transport(account.base_url)
+        )
+
+    async def _async_run_account(self, account: Account) -> None:
+        api = self._create_api(account)
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            start = time.monotonic()
+            await self.async_poll(api, account)
+            await asyncio.sleep(max(self.interval - (time.monotonic() - start), 0))
+
+    async def _async_write(self) -> None:
+        """Write the queued readings in batches until the stop marker.
+
+        A batch is written once it is full or flush_interval after its first
+        reading, whichever comes first.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            if (reading := await self._queue.get()) is _STOP:
+                break
+            self._pending.append(reading)
+            try:
+                async with asyncio.timeout_at(loop.time() + self.flush_interval):
+                    while len(self._pending) < self.batch_size:
+                        if (reading := await self._queue.get()) is _STOP:
+                            stopping = True
+                            break
+                        self._pending.append(reading)
+            except TimeoutError:
+                pass
+            await self._async_flush()
+        await self._async_flush()
+
+    async def _async_flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.sink.write, batch
+            )
+            self.written += len(batch)
+
+    async def async_run(self, once: bool = False) -> None:
+        """Collect until cancelled, or poll every account once."""
+        writer = asyncio.create_task(self._async_write())
+        try:
+            if once:
+                await asyncio.gather(
+                    *(
+                        self.async_poll(self._create_api(account), account)
+                        for account in self.accounts
+                    )
+                )
+            else:
+                await asyncio.gather(
+                    *(self._async_run_account(account) for account in self.accounts)
+                )
+        finally:
+            # The writer is stopped through the queue rather than cancelled,
+            # so it drains the readings queued before the marker.
+            self._queue.put_nowait(_STOP)
+            await writer
+            await async_close_transports()
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the collector from the command line arguments."""
+    with open(args.config, encoding="utf-8") as file:
+        config = json.load(file)
+
+    accounts = [Account.from_config(account) for account in config["accounts"]]
+    if rate := config.get("requests_per_second"):
+        for base_url in {account.base_url for account in accounts}:
+            get_region_limiter(base_url).rate = rate
+
+    output = args.output or config.get("output", "readings.sqlite")
+    sink = NDJSONSink(output) if output.endswith(".ndjson") else SQLiteSink(output)
+    collector = Collector(
+        accounts,
+        sink,
+        concurrency=config.get("concurrency", COLLECTOR_CONCURRENCY),
+        interval=config.get("interval", COLLECTOR_INTERVAL_SECONDS),
+        batch_size=config.get("batch_size", COLLECTOR_BATCH_SIZE),
+        flush_interval=config.get("flush_interval", COLLECTOR_FLUSH_SECONDS),
+    )
+
+    task = asyncio.create_task(collector.async_run(once=args.once))
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, task.cancel)
+    start = time.monotonic()
+    try:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    finally:
+        sink.close()
+
+    LOGGER.info(
+        "%s polls of %s accounts in %.1fs, %s failed, %s readings written to %s",
+        collector.polls,
+        len(accounts),
+        time.monotonic() - start,
+        collector.failed_polls,
+        collector.written,
+        output,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", help="JSON config file")
+    parser.add_argument("--output", help="SQLite database or .ndjson file")
+    parser.add_argument("--once", action="store_true", help="poll every account once")
+    parser.add_argument("--verbose", action="store_true")
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if arguments.verbose else logging.INFO)
+    asyncio.run(async_main(arguments))
@@ -11,8 +11,7 @@ from homeassistant.const import (
     CONF_URL,
     CONF_USERNAME,
 )
-
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.core import callback
 from homeassistant.helpers.selector import (
     SelectOptionDict,
     SelectSelector,
@@ -24,11 +23,15 @@ from homeassistant.helpers.selector import (
 )
 
 from .api import (
-    LibreLinkAPI,
     LibreLinkAPIAuthenticationError,
     LibreLinkAPIConnectionError,
     LibreLinkAPIError,
 )
+from .auth import (
+    LibreLinkAuthManager,
+    async_get_auth_manager,
+    async_release_auth_manager,
+)
 
 from .const import BASE_URL_LIST, CONF_PATIENT_ID, DOMAIN, LOGGER
 from .units import UNITS_OF_MEASUREMENT
@@ -38,6 +41,8 @@ class LibreLinkFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    auth: LibreLinkAuthManager | None = None
+
     async def async_step_user(
         self,
         user_input: dict | None = None,
@@ -50,13 +55,16 @@ class LibreLinkFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 password = user_input[CONF_PASSWORD]
                 base_url = user_input[CONF_URL]
 
-                client = LibreLinkAPI(
-                    base_url=base_url, session=async_create_clientsession(self.hass)
-                )
-                await client.async_login(username, password)
+                # The token obtained here is handed over to the config entry.
+                auth = async_get_auth_manager(self.hass, base_url, username, password)
+                if self.auth is not None and self.auth is not auth:
+                    async_release_auth_manager(self.hass, self.auth)
+                self.auth = auth
+                await auth.async_login()
 
-                self.patients = await client.async_get_data()
-                self.basic_info = user_input
+                self.patients = await auth.api.async_get_data()
+                # Entries go straight to the region the login was redirected to.
+                self.basic_info = user_input | {CONF_URL: auth.api.base_url}
 
                 return await self.async_step_patient()
             except LibreLinkAPIAuthenticationError as e:
@@ -97,6 +105,12 @@ class LibreLinkFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             errors=_errors,
         )
 
+    @callback
+    def async_remove(self) -> None:
+        """Forget the account manager, unless the new entry now uses it."""
+        if self.auth is not None:
+            async_release_auth_manager(self.hass, self.auth)
+
     async def async_step_patient(self, user_input=None):
         """Handle a flow to select specific patient."""
         if user_input is not None:
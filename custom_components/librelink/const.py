@@ -7,14 +7,19 @@ LOGGER: Logger = getLogger(__package__)
 
 NAME: Final = "LibreLink"
 DOMAIN: Final = "librelink"
+DATA_AUTH: Final = f"{DOMAIN}_auth"
+DATA_PATIENTS: Final = f"{DOMAIN}_patients"
 VERSION: Final = "1.2.3"
 ATTRIBUTION: Final = "Data provided by https://libreview.com"
 LOGIN_URL: Final = "/llu/auth/login"
 CONNECTION_URL: Final = "/llu/connections"
+GRAPH_URL: Final = "/llu/connections/{patient_id}/graph"
+LOGBOOK_URL: Final = "/llu/connections/{patient_id}/logbook"
 BASE_URL_LIST: Final = {
     "Global": "https://api.libreview.io",
     "Latin America": "https://api-la.libreview.io",
 }
+REGION_URL: Final = "https://api-{region}.libreview.io"
 PRODUCT = "llu.android"
 VERSION_APP = "4.7"
 GLUCOSE_VALUE_ICON: Final = "mdi:diabetes"
@@ -36,4 +41,56 @@ GLUCOSE_TREND_MESSAGE: Final = {
 CONF_PATIENT_ID: Final = "patient_id"
 
 REFRESH_RATE_MIN: Final = 1
+READING_CADENCE_SECONDS: Final = 60
+POLL_MARGIN_SECONDS: Final = 3
+POLL_BACKOFF_SECONDS: Final = 5
+POLL_MIN_DELAY_SECONDS: Final = 5
+POLL_PROBE_HITS: Final = 10
+# Patients near or outside their target, or trending fast, are polled for as
+# soon as their reading is expected, the others at most every bulk delay
+# unless their reading is late. They go back to the bulk tier after a few
+# readings well within the target.
+TIER_TARGET_MARGIN_MGDL: Final = 20
+TIER_HYSTERESIS_MGDL: Final = 10
+TIER_FAST_TRENDS: Final = (1, 5)
+TIER_DEMOTE_READINGS: Final = 5
+TIER_BULK_MIN_DELAY_SECONDS: Final = 45
 API_TIME_OUT_SECONDS: Final = 20
+API_MAX_RETRIES: Final = 3
+API_BACKOFF_SECONDS: Final = 2
+REGION_REQUESTS_PER_SECOND: Final = 2
+TRANSPORT_CONNECTIONS_PER_HOST: Final = 4
+TRANSPORT_KEEPALIVE_SECONDS: Final = 120
+TRANSPORT_DNS_CACHE_SECONDS: Final = 600
+REGION_REQUEST_BURST: Final = 4
+TOKEN_EXPIRY_MARGIN_SECONDS: Final = 300
+# Tickets are renewed in the background before polls would consider them
+# expired, and renewals that failed are retried after a short delay.
+TOKEN_RENEWAL_MARGIN_SECONDS: Final = 600
+TOKEN_RENEWAL_RETRY_SECONDS: Final = 60
+BREAKER_FAILURE_THRESHOLD: Final = 3
+BREAKER_RESET_SECONDS: Final = 60
+BREAKER_MAX_RESET_SECONDS: Final = 900
+BREAKER_PROBE_TIMEOUT_SECONDS: Final = 5
+STATISTICS_GAP_SECONDS: Final = 5 * 60
+STATISTICS_IMPORT_CHUNK_HOURS: Final = 24
+STORAGE_VERSION: Final = 1
+STORAGE_SAVE_DELAY_SECONDS: Final = 300
+HISTORY_DAYS: Final = 14
+# An hour of headroom keeps readings leaving the 14-day metrics window in the
+# history until they are evicted from the running sums.
+HISTORY_CAPACITY: Final = (HISTORY_DAYS * 1440) + 60
+# History files keep the same span, compacted at most once a day.
+HISTORY_RETENTION_SECONDS: Final = HISTORY_CAPACITY * 60
+HISTORY_COMPACT_SLACK_SECONDS: Final = 24 * 3600
+FORECAST_WINDOW_MIN: Final = 15
+FORECAST_MIN_READINGS: Final = 3
+PREDICTION_HORIZON_MIN: Final = 15
+METRICS_WINDOWS: Final = {
+    "24h": 24 * 3600,
+    "14d": HISTORY_DAYS * 24 * 3600,
+}
+COLLECTOR_CONCURRENCY: Final = 20
+COLLECTOR_INTERVAL_SECONDS: Final = 60
+COLLECTOR_BATCH_SIZE: Final = 500
+COLLECTOR_FLUSH_SECONDS: Final = 10
@@ -2,13 +2,54 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from datetime import UTC, datetime, timedelta
+import os
+import time
+from typing import TYPE_CHECKING
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import slugify
 
-from .api import LibreLinkAPI, Patient
-from .const import DOMAIN, LOGGER, REFRESH_RATE_MIN
+from .api import LibreLinkAPI, LibreLinkAPIConnectionError, LibreLinkAPIError, Patient
+from .breaker import BreakerState, CircuitBreaker
+from .const import (
+    BREAKER_PROBE_TIMEOUT_SECONDS,
+    DOMAIN,
+    FORECAST_WINDOW_MIN,
+    HISTORY_RETENTION_SECONDS,
+    LOGGER,
+    METRICS_WINDOWS,
+    PREDICTION_HORIZON_MIN,
+    REFRESH_RATE_MIN,
+    STATISTICS_GAP_SECONDS,
+    TIER_BULK_MIN_DELAY_SECONDS,
+)
+from .forecast import Forecast, linear_forecast
+from .history import GlucoseHistory
+from .historyfile import MappedGlucoseHistory
+from .metrics import RollingGlycemicMetrics
+from .registry import async_get_patient_registry
+from .scheduler import ReadingScheduler, RefreshTier, TierClassifier
+
+if TYPE_CHECKING:
+    from .auth import LibreLinkAuthManager
+
+def history_path(hass: HomeAssistant, patient_id: str) -> str:
+    """Return the path of the history file of a patient."""
+    return hass.config.path(
+        STORAGE_DIR, f"{DOMAIN}.history", f"{slugify(patient_id)}.bin"
+    )
+
+def _fingerprint(patient: Patient) -> tuple:
+    """Return what identifies a new reading or target of a patient."""
+    return (
+        patient.measurement.timestamp,
+        patient.measurement.value,
+        patient.target,
+    )
 
 class LibreLinkDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Patient]]):
     """Class to manage fetching data from the API. single endpoint."""
@@ -18,10 +59,32 @@ class LibreLinkDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Patient]]):
         hass: HomeAssistant,
         api: LibreLinkAPI,
         patient_id: str,
+        adaptive_polling: bool = True,
+        auth: LibreLinkAuthManager | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        With adaptive_polling, each poll is planned just after the next reading
+        is expected instead of on a fixed interval. With auth, each poll first
+        makes sure a valid token is held and its result is persisted.
+        """
         self.api: LibreLinkAPI = api
+        self.auth = auth
+        self.registry = async_get_patient_registry(hass)
+        self.registry.subscribe(patient_id, self)
+        self.breaker = CircuitBreaker()
+        self.stale = False
+        self.stale_since: datetime | None = None
+        self.adaptive_polling = adaptive_polling
         self._tracked_patients: set[str] = {patient_id}
+        self._schedulers: dict[str, ReadingScheduler] = {}
+        self._tiers: dict[str, TierClassifier] = {}
+        self._metrics: dict[str, dict[str, RollingGlycemicMetrics]] = {}
+        self._forecasts: dict[str, Forecast | None] = {}
+        self.changed_patients: set[str] = set()
+        self._statistics_imports: set[str] = set()
+        self.state_writes = 0
+        self.skipped_state_writes = 0
 
         super().__init__(
             hass=hass,
@@ -33,16 +96,406 @@ class LibreLinkDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Patient]]):
     def register_patient(self, patient_id: str) -> None:
         """Register a new patient to track."""
         self._tracked_patients.add(patient_id)
+        self.registry.subscribe(patient_id, self)
 
     def unregister_patient(self, patient_id: str) -> None:
         """Unregister a patient to track."""
         self._tracked_patients.remove(patient_id)
+        self.registry.unsubscribe(patient_id, self)
+        self._release_history(patient_id)
+        self._metrics.pop(patient_id, None)
+        self._forecasts.pop(patient_id, None)
+        self._schedulers.pop(patient_id, None)
+        self._tiers.pop(patient_id, None)
+
+    def _release_history(self, patient_id: str) -> None:
+        """Forget the history of a patient, closing its file unless shared."""
+        history = self.api.history.pop(patient_id, None)
+        # The history file is shared with the other accounts of the patient.
+        if isinstance(history, MappedGlucoseHistory) and not any(
+            other.api.history.get(patient_id) is history
+            for other in self.registry.subscribers(patient_id)
+        ):
+            self.hass.async_create_background_task(
+                history.async_close(), f"{DOMAIN} close history {patient_id}"
+            )
+
+    def restore(self, connections: list[dict]) -> None:
+        """Serve persisted patient data, marked stale until the next refresh."""
+        self.data = {
+            patient.id: patient
+            for patient in (
+                Patient.from_api_response_data(connection)
+                for connection in connections
+            )
+        }
+        self.stale = True
 
     @property
     def tracked_patients(self) -> int:
         """Return the number of tracked patients."""
         return len(self._tracked_patients)
 
+    @property
+    def primary_patients(self) -> int:
+        """Return the number of tracked patients fetched by this account."""
+        return sum(self.source(pid) is self for pid in self._tracked_patients)
+
+    @property
+    def fast_patients(self) -> int:
+        """Return the number of tracked patients in the fast tier."""
+        return sum(
+            self.tier(patient_id) is RefreshTier.FAST
+            for patient_id in self._tracked_patients
+        )
+
+    def tier(self, patient_id: str) -> RefreshTier:
+        """Return the refresh tier of a patient."""
+        if (classifier := self._tiers.get(patient_id)) is None:
+            return RefreshTier.BULK
+        return classifier.tier
+
+    @property
+    def reading_latency(self) -> float | None:
+        """Return the mean delay in seconds between a reading and its poll."""
+        latencies = [
+            scheduler.latency
+            for scheduler in self._schedulers.values()
+            if scheduler.latency is not None
+        ]
+        return sum(latencies) / len(latencies) if latencies else None
+
+    @property
+    def healthy(self) -> bool:
+        """Return whether the account can fetch the patients it follows."""
+        return (
+            self.last_update_success
+            and not self.stale
+            and self.breaker.state is BreakerState.CLOSED
+        )
+
+    def source(self, patient_id: str) -> LibreLinkDataUpdateCoordinator:
+        """Return the coordinator fetching a patient, this one or another account."""
+        primary = self.registry.primary(patient_id)
+        if primary is None or not primary.data or patient_id not in primary.data:
+            return self
+        return primary
+
+    def _fetches(self, patient_id: str) -> bool:
+        """Return whether this account fetches a patient on the next poll.
+
+        An account which is failing fetches all its patients, its polls are
+        the probes telling when it can be primary again.
+        """
+        return not self.healthy or self.source(patient_id) is self
+
+    def history(
+        self, patient_id: str
+    ) -> GlucoseHistory | MappedGlucoseHistory | None:
+        """Return the glucose history of a patient, once backfilled."""
+        return self.source(patient_id).api.history.get(patient_id)
+
+    def metrics(self, patient_id: str, window: str) -> RollingGlycemicMetrics | None:
+        """Return the rolling glycemic metrics of a patient for a window."""
+        return self.source(patient_id)._metrics.get(patient_id, {}).get(window)
+
+    def forecast(self, patient_id: str) -> Forecast | None:
+        """Return the short-horizon glucose forecast of a patient."""
+        return self.source(patient_id)._forecasts.get(patient_id)
+
+    @callback
+    def async_receive(self, patient: Patient) -> None:
+        """Take the data of a patient fetched by another account."""
+        if self.data is None or patient.id not in self._tracked_patients:
+            return
+        previous = self.data.get(patient.id)
+        if previous and previous.measurement.timestamp > patient.measurement.timestamp:
+            return
+        self.data = {**self.data, patient.id: patient}
+        if previous is None or _fingerprint(previous) != _fingerprint(patient):
+            self.changed_patients = {patient.id}
+            self.async_update_listeners()
+
+    def _update_metrics(
+        self, patient: Patient, history: GlucoseHistory | MappedGlucoseHistory
+    ) -> None:
+        """Feed the readings added to the history into the rolling metrics."""
+        low, high = patient.target.low, patient.target.high
+        metrics = self._metrics.setdefault(patient.id, {})
+        for window, seconds in METRICS_WINDOWS.items():
+            if window not in metrics:
+                metrics[window] = RollingGlycemicMetrics(seconds, low, high)
+            metrics[window].set_target(low, high, history)
+            metrics[window].update(history)
+
+    async def _async_open_history(self, patient_id: str) -> None:
+        """Load the history file of a patient, when it can be opened."""
+        for other in self.registry.subscribers(patient_id):
+            if (history := other.api.history.get(patient_id)) is not None:
+                # Another account fetched the patient before, share its file.
+                self.api.history[patient_id] = history
+                return
+
+        path = history_path(self.hass, patient_id)
+
+        def _open() -> MappedGlucoseHistory:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return MappedGlucoseHistory(path)
+
+        try:
+            history = await self.hass.async_add_executor_job(_open)
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Keeping history of %s in memory: %s", patient_id, e)
+            return
+
+        for other in self.registry.subscribers(patient_id):
+            if (shared := other.api.history.get(patient_id)) is not None:
+                # Opened meanwhile by another account polling concurrently.
+                self.hass.async_add_executor_job(history.close)
+                history = shared
+                break
+        self.api.history[patient_id] = history
+
+    def _schedule_statistics_import(self, patient: Patient) -> None:
+        """Backfill the long-term statistics of a patient in the background."""
+        if (
+            "recorder" not in self.hass.config.components
+            or patient.id in self._statistics_imports
+        ):
+            return
+
+        self._statistics_imports.add(patient.id)
+        self.hass.async_create_background_task(
+            self._async_import_statistics(patient),
+            f"{DOMAIN} statistics import {patient.id}",
+        )
+
+    async def _async_import_statistics(self, patient: Patient) -> None:
+        # The recorder is an optional dependency, only import it when loaded.
+        from .statistics import async_import_statistics  # pylint: disable=import-outside-toplevel
+
+        try:
+            await async_import_statistics(
+                self.hass, self.api, patient, self.history(patient.id)
+            )
+        except LibreLinkAPIError as e:
+            LOGGER.warning("Unable to import statistics of %s: %s", patient.id, e)
+        finally:
+            self._statistics_imports.discard(patient.id)
+
+    def _observe(self, patient: Patient, now: float) -> None:
+        """Feed a polled reading to the scheduler and tier of its patient."""
+        measurement = patient.measurement
+        if self._schedulers.setdefault(patient.id, ReadingScheduler()).observe(
+            measurement.timestamp.timestamp(), now
+        ):
+            self._tiers.setdefault(patient.id, TierClassifier()).observe(
+                measurement.value,
+                measurement.trend,
+                patient.target.low,
+                patient.target.high,
+            )
+
+    def _schedule_next_poll(self, patients: dict[str, Patient]) -> None:
+        """Plan the next poll after the earliest expected reading.
+
+        A poll refreshes every patient of the account, the fast tier patients
+        are polled for as soon as their reading is expected. The bulk tier
+        ones are only polled for after a longer delay, unless their reading
+        is late.
+        """
+        now = time.time()
+        for patient in patients.values():
+            self._observe(patient, now)
+
+        if self.adaptive_polling and self._schedulers:
+            delays = []
+            for patient_id, scheduler in self._schedulers.items():
+                if not self._fetches(patient_id):
+                    continue
+                delay = scheduler.next_delay(now)
+                if self.tier(patient_id) is RefreshTier.BULK and not scheduler.overdue(
+                    now
+                ):
+                    delay = max(delay, TIER_BULK_MIN_DELAY_SECONDS)
+                delays.append(delay)
+            self.update_interval = timedelta(
+                seconds=min(delays) if delays else REFRESH_RATE_MIN * 60
+            )
+            LOGGER.debug(
+                "Next poll in %s, reading latency %ss",
+                self.update_interval,
+                self.reading_latency,
+            )
+
     async def _async_update_data(self):
-        """Update data via library."""
-        return {patient.id: patient for patient in await self.api.async_get_data()}
+        """Update data via library.
+
+        While LibreView fails, the last data is served marked stale and the
+        circuit breaker keeps requests to cheap, short probes.
+        """
+        instrumentation = self.api.instrumentation
+        instrumentation.count("polls")
+        state = self.breaker.state
+        if state is BreakerState.OPEN:
+            instrumentation.count("failed_polls")
+            return self._serve_stale()
+
+        start = time.perf_counter()
+        try:
+            patients = await self._async_fetch_data(
+                probe=state is BreakerState.HALF_OPEN
+            )
+        except (LibreLinkAPIConnectionError, TimeoutError) as e:
+            instrumentation.count("failed_polls")
+            self.breaker.record_failure()
+            LOGGER.debug("Update failed, circuit breaker %s: %s", self.breaker.state, e)
+            if not self.data:
+                raise UpdateFailed(str(e) or "Connection error") from e
+            return self._serve_stale()
+        except Exception:
+            instrumentation.count("failed_polls")
+            raise
+        finally:
+            instrumentation.record("poll", time.perf_counter() - start)
+
+        return patients
+
+    @property
+    def error_rate(self) -> float | None:
+        """Return the share of failed polls in percent."""
+        counters = self.api.instrumentation.counters
+        if not counters["polls"]:
+            return None
+        return counters["failed_polls"] / counters["polls"] * 100
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, timing the fan-out."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.api.instrumentation.record("fan_out", time.perf_counter() - start)
+
+    def _serve_stale(self) -> dict[str, Patient]:
+        """Return the last data, marked stale."""
+        if self.data is None:
+            raise UpdateFailed("LibreView is unavailable")
+        self.stale = True
+        if self.stale_since is None:
+            self.stale_since = datetime.now(UTC)
+        self.changed_patients = set()
+        return self.data
+
+    async def _async_fetch_data(self, probe: bool = False) -> dict[str, Patient]:
+        """Fetch and process the data of the tracked patients.
+
+        The patients fetched by another account are taken from it, an account
+        following only such patients makes no request at all. A probe only
+        bounds the connections request, the circuit breaker closes before
+        the history gaps of the outage are backfilled.
+        """
+        fetched = {pid for pid in self._tracked_patients if self._fetches(pid)}
+        self.api.instrumentation.count(
+            "delegated_patients", len(self._tracked_patients) - len(fetched)
+        )
+        async with asyncio.timeout(BREAKER_PROBE_TIMEOUT_SECONDS if probe else None):
+            if self.auth and fetched:
+                await self.auth.async_login()
+
+            patients = (
+                {
+                    patient.id: patient
+                    for patient in await self.api.async_get_data(fetched)
+                }
+                if fetched
+                else {}
+            )
+        self.breaker.record_success()
+
+        # The history follows the poll, the graph is only fetched when a
+        # history is new or readings were missed since its last one.
+        for patient in patients.values():
+            if patient.id not in self.api.history:
+                await self._async_open_history(patient.id)
+            history = self.api.history.get(patient.id)
+            last_reading = history.last_timestamp if history is not None else None
+            measurement = patient.measurement
+            try:
+                await self.api.async_sync_history(patient)
+            except LibreLinkAPIError as e:
+                LOGGER.warning("Unable to backfill history of %s: %s", patient.id, e)
+                if history is None:
+                    continue
+                if isinstance(history, MappedGlucoseHistory) and not history:
+                    # Retried on the next poll, which opens the file again.
+                    self._release_history(patient.id)
+                    continue
+                # The gap stays, but the history keeps up with the readings.
+                history.append(
+                    int(measurement.timestamp.timestamp()),
+                    measurement.value,
+                    measurement.trend,
+                )
+
+            # Readings missed while offline only reach the recorder as statistics.
+            if (
+                last_reading is None
+                or measurement.timestamp.timestamp() - last_reading
+                > STATISTICS_GAP_SECONDS
+            ):
+                self._schedule_statistics_import(patient)
+
+        for patient in patients.values():
+            await self._async_analyze(patient)
+
+        for patient in patients.values():
+            for other in self.registry.subscribers(patient.id):
+                if other is not self:
+                    other.async_receive(patient)
+
+        patients = self._collect(patients)
+        self._schedule_next_poll(patients)
+
+        previous = self.data or {}
+        for patient_id, patient in patients.items():
+            # Another account may have handed a newer reading during the poll.
+            if (current := previous.get(patient_id)) and (
+                current.measurement.timestamp > patient.measurement.timestamp
+            ):
+                patients[patient_id] = current
+        self.changed_patients = {
+            patient.id
+            for patient in patients.values()
+            if patient.id not in previous
+            or _fingerprint(previous[patient.id]) != _fingerprint(patient)
+        }
+
+        self.stale = False
+        self.stale_since = None
+        if self.auth:
+            self.auth.async_save()
+
+        return patients
+
+    async def _async_analyze(self, patient: Patient) -> None:
+        """Update the metrics and forecast of a patient from its history."""
+        if history := self.api.history.get(patient.id):
+            if isinstance(history, MappedGlucoseHistory):
+                await history.async_flush(
+                    history.last_timestamp - HISTORY_RETENTION_SECONDS
+                )
+            self._update_metrics(patient, history)
+            timestamps, values, _ = history.window(
+                history.last_timestamp - FORECAST_WINDOW_MIN * 60
+            )
+            self._forecasts[patient.id] = linear_forecast(
+                timestamps, values, PREDICTION_HORIZON_MIN * 60
+            )
+
+    def _collect(self, patients: dict[str, Patient]) -> dict[str, Patient]:
+        """Add the patients fetched by other accounts to the fetched ones."""
+        for patient_id in self._tracked_patients - patients.keys():
+            source = self.source(patient_id)
+            if source is not self:
+                patients[patient_id] = source.data[patient_id]
+        return patients
@@ -0,0 +1,72 @@
+"""Diagnostics support for LibreLink."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import LibreLinkDataUpdateCoordinator
+from .ratelimit import get_region_limiter
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "token",
+    "patientId",
+    "patient_id",
+    "firstName",
+    "lastName",
+    "sn",
+    "did",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: LibreLinkDataUpdateCoordinator = hass.data[DOMAIN][
+        entry.data[CONF_USERNAME]
+    ]
+    api = coordinator.api
+    limiter = get_region_limiter(api.base_url)
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "coordinator": {
+            "tracked_patients": coordinator.tracked_patients,
+            "primary_patients": coordinator.primary_patients,
+            "unique_patients": coordinator.registry.patients,
+            "fast_patients": coordinator.fast_patients,
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "stale": coordinator.stale,
+            "stale_since": coordinator.stale_since,
+            "breaker": coordinator.breaker.state,
+            "error_rate": coordinator.error_rate,
+            "reading_latency": coordinator.reading_latency,
+            "state_writes": coordinator.state_writes,
+            "skipped_state_writes": coordinator.skipped_state_writes,
+        },
+        "api": {
+            "base_url": api.base_url,
+            "token_valid": api.token_valid,
+            "token_expires": api.token_expires,
+            "last_timings": asdict(api.last_timings) if api.last_timings else None,
+            # Patient ids are redacted, only the history sizes are reported.
+            "history": [len(history) for history in api.history.values()],
+        },
+        "rate_limiter": {
+            "queue_depth": limiter.queue_depth,
+            "requests": limiter.requests,
+            "throttled": limiter.throttled,
+        },
+        "instrumentation": api.instrumentation.as_dict(),
+        "connections": async_redact_data(list(api.connections.values()), TO_REDACT),
+    }
@@ -0,0 +1,46 @@
+"""Short-horizon glucose forecasting for LibreLink."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from .const import FORECAST_MIN_READINGS
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """Glucose forecast data."""
+
+    rate: float
+    value: float
+
+
+def linear_forecast(
+    timestamps: Sequence[int], values: Sequence[int], horizon: int
+) -> Forecast | None:
+    """Fit a line through a window of readings and extrapolate it.
+
+    Timestamps are epoch seconds and values mg/dL as stored by GlucoseHistory,
+    as arrays or as views of a MappedGlucoseHistory.
+    The rate is in mg/dL per minute and the value is predicted horizon seconds
+    after the last reading.
+    """
+    if len(timestamps) < FORECAST_MIN_READINGS:
+        return None
+
+    x = np.asarray(timestamps, dtype=np.int64)
+    x = (x - x[-1]) / 60.0
+    y = np.asarray(values, dtype=np.float64)
+
+    dx = x - x.mean()
+    denominator = dx @ dx
+    if not denominator:
+        return None
+
+    rate = float(dx @ (y - y.mean()) / denominator)
+    # Value of the fitted line at the last reading, where x is 0.
+    last = float(y.mean() - rate * x.mean())
+    return Forecast(rate=rate, value=last + rate * horizon / 60)
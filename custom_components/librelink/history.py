@@ -0,0 +1,98 @@
+"""Glucose history storage for LibreLink."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from .const import HISTORY_CAPACITY
+
+
+class GlucoseHistory:
+    """Fixed-capacity ring buffer of glucose readings.
+
+    Readings are kept oldest first in three parallel arrays holding the epoch
+    timestamp in seconds, the value in mg/dL and the trend arrow (0 when
+    unknown). Once full, each new reading overwrites the oldest one.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        """Initialize an empty history."""
+        self.capacity = capacity
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._values = array("H", bytes(2 * capacity))
+        self._trends = array("b", bytes(capacity))
+        self._total = 0
+
+    def __len__(self) -> int:
+        """Return the number of readings currently stored."""
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """Return the number of readings appended since creation."""
+        return self._total
+
+    @property
+    def last_timestamp(self) -> int | None:
+        """Return the timestamp of the most recent reading."""
+        if not self._total:
+            return None
+        return self._timestamps[(self._total - 1) % self.capacity]
+
+    def append(self, timestamp: int, value: int, trend: int = 0) -> bool:
+        """Append a reading, ignoring it unless newer than the last one."""
+        if self._total and timestamp <= self._timestamps[
+            (self._total - 1) % self.capacity
+        ]:
+            return False
+
+        index = self._total % self.capacity
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        self._trends[index] = trend
+        self._total += 1
+        return True
+
+    def merge(
+        self,
+        timestamps: Sequence[int],
+        values: Sequence[int],
+        trends: Sequence[int],
+    ) -> int:
+        """Append the readings newer than the last one and return how many."""
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        return sum(self.append(timestamps[i], values[i], trends[i]) for i in order)
+
+    def point(self, sequence: int) -> tuple[int, int, int]:
+        """Return the reading with the given sequence number (see total)."""
+        if not self._total - len(self) <= sequence < self._total:
+            raise IndexError(sequence)
+        index = sequence % self.capacity
+        return self._timestamps[index], self._values[index], self._trends[index]
+
+    def window(self, since: int) -> tuple[array, array, array]:
+        """Return copies of the readings taken at or after since, oldest first."""
+        size = len(self)
+        start = self._total - size
+        first = bisect_left(
+            range(start, self._total),
+            since,
+            key=lambda sequence: self._timestamps[sequence % self.capacity],
+        )
+        begin = (start + first) % self.capacity
+        end = begin + size - first
+
+        if end <= self.capacity:
+            return (
+                self._timestamps[begin:end],
+                self._values[begin:end],
+                self._trends[begin:end],
+            )
+        end -= self.capacity
+        return (
+            self._timestamps[begin:] + self._timestamps[:end],
+            self._values[begin:] + self._values[:end],
+            self._trends[begin:] + self._trends[:end],
+        )
@@ -0,0 +1,280 @@
+"""Memory-mapped on-disk glucose history for LibreLink.
+
+Each patient has an append-only file made of a 16-byte header followed by
+16-byte records::
+
+    header  <6sHQ   magic, format version, sequence of the first record
+    record  <qHb5x  epoch timestamp, value in mg/dL, trend arrow, padding
+
+Records are appended with a single write and read through a read-only memory
+map, so the readings live in the page cache instead of the Python heap. A
+crash can leave a partial or torn record at the end of the file, which is
+dropped when the file is opened again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .const import HISTORY_COMPACT_SLACK_SECONDS, LOGGER
+
+_HEADER = struct.Struct("<6sHQ")
+_RECORD = struct.Struct("<qHb5x")
+_MAGIC = b"LLHIST"
+_VERSION = 1
+RECORD_DTYPE = np.dtype(
+    {
+        "names": ["timestamp", "value", "trend"],
+        "formats": ["<i8", "<u2", "i1"],
+        "offsets": [0, 8, 10],
+        "itemsize": _RECORD.size,
+    }
+)
+
+
+def _concatenate(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Concatenate records, keeping their padding unlike np.concatenate."""
+    records = np.zeros(len(first) + len(second), RECORD_DTYPE)
+    records[: len(first)] = first
+    records[len(first) :] = second
+    return records
+
+
+class MappedGlucoseHistory:
+    """Glucose history persisted in a memory-mapped append-only file.
+
+    It behaves like GlucoseHistory, except that it is not bounded by a
+    capacity but by compaction, and that window() returns read-only views of
+    the file instead of copies once the readings are written. Opening and
+    closing do blocking IO and belong in the executor.
+
+    Readings are merged in memory on the event loop, async_flush writes them
+    and compacts the file from the executor. Flushes and closing are
+    serialized, merges go on while they run.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open or create the history file at path, recovering its tail."""
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            self._first, self._count = self._recover()
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._map: mmap.mmap | None = None
+        self._records: np.ndarray = np.empty(0, RECORD_DTYPE)
+        # Readings merged since the last flush.
+        self._pending: np.ndarray = np.empty(0, RECORD_DTYPE)
+        self._lock = asyncio.Lock()
+        self._map, self._records = self._mapped(self._fd, self._count)
+
+    def _recover(self) -> tuple[int, int]:
+        """Check the header and drop an incomplete or torn tail."""
+        size = os.fstat(self._fd).st_size
+        header = os.pread(self._fd, _HEADER.size, 0)
+        if size < _HEADER.size or header[:6] != _MAGIC:
+            if size:
+                LOGGER.warning("Resetting invalid history file %s", self.path)
+            os.ftruncate(self._fd, 0)
+            os.write(self._fd, _HEADER.pack(_MAGIC, _VERSION, 0))
+            return 0, 0
+
+        _, version, first = _HEADER.unpack(header)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported history file version {version}")
+
+        count = (size - _HEADER.size) // _RECORD.size
+        timestamps = np.frombuffer(
+            os.pread(self._fd, count * _RECORD.size, _HEADER.size),
+            dtype=RECORD_DTYPE,
+        )["timestamp"]
+        valid = count
+        while valid and (
+            timestamps[valid - 1] <= 0
+            or (valid > 1 and timestamps[valid - 1] <= timestamps[valid - 2])
+        ):
+            valid -= 1
+
+        end = _HEADER.size + valid * _RECORD.size
+        if end != size:
+            LOGGER.warning(
+                "Dropping %s bytes at the end of history file %s",
+                size - end,
+                self.path,
+            )
+            os.ftruncate(self._fd, end)
+        return first, valid
+
+    @staticmethod
+    def _mapped(fd: int, count: int) -> tuple[mmap.mmap, np.ndarray]:
+        """Map the first count records of a file.
+
+        The previous map is not closed: views returned by window() may still
+        use it, it is released with them.
+        """
+        records_map = mmap.mmap(
+            fd, _HEADER.size + count * _RECORD.size, access=mmap.ACCESS_READ
+        )
+        return records_map, np.frombuffer(
+            records_map, dtype=RECORD_DTYPE, count=count, offset=_HEADER.size
+        )
+
+    def __len__(self) -> int:
+        """Return the number of readings currently stored."""
+        return self._count + len(self._pending)
+
+    @property
+    def total(self) -> int:
+        """Return the number of readings appended since the file was created."""
+        return self._first + len(self)
+
+    @property
+    def last_timestamp(self) -> int | None:
+        """Return the timestamp of the most recent reading."""
+        if len(self._pending):
+            return int(self._pending[-1]["timestamp"])
+        if not self._count:
+            return None
+        return int(self._records[-1]["timestamp"])
+
+    def append(self, timestamp: int, value: int, trend: int = 0) -> bool:
+        """Append a reading, ignoring it unless newer than the last one."""
+        return self.merge((timestamp,), (value,), (trend,)) == 1
+
+    def merge(
+        self,
+        timestamps: Sequence[int],
+        values: Sequence[int],
+        trends: Sequence[int],
+    ) -> int:
+        """Append the readings newer than the last one and return how many.
+
+        They are kept in memory until the next flush.
+        """
+        last = self.last_timestamp
+        order = []
+        for i in sorted(range(len(timestamps)), key=timestamps.__getitem__):
+            if last is None or timestamps[i] > last:
+                last = timestamps[i]
+                order.append(i)
+        if not order:
+            return 0
+
+        # Zeroed, so that the padding written to the file is too.
+        added = np.zeros(len(order), RECORD_DTYPE)
+        added["timestamp"] = [timestamps[i] for i in order]
+        added["value"] = [values[i] for i in order]
+        added["trend"] = [trends[i] for i in order]
+        self._pending = _concatenate(self._pending, added)
+        return len(order)
+
+    def point(self, sequence: int) -> tuple[int, int, int]:
+        """Return the reading with the given sequence number (see total)."""
+        if not self._first <= sequence < self.total:
+            raise IndexError(sequence)
+        index = sequence - self._first
+        if index >= self._count:
+            record = self._pending[index - self._count]
+            return int(record["timestamp"]), int(record["value"]), int(record["trend"])
+        return _RECORD.unpack_from(self._map, _HEADER.size + index * _RECORD.size)
+
+    def window(self, since: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the readings taken at or after since, oldest first.
+
+        They are views of the file, unless readings are still to be flushed.
+        """
+        records = self._records
+        if len(self._pending):
+            records = _concatenate(records, self._pending)
+        first = int(np.searchsorted(records["timestamp"], since))
+        records = records[first:]
+        return records["timestamp"], records["value"], records["trend"]
+
+    def needs_compaction(self, before: int) -> bool:
+        """Return whether enough readings older than before can be dropped."""
+        records = self._records if self._count else self._pending
+        return bool(
+            len(records)
+            and records[0]["timestamp"] < before - HISTORY_COMPACT_SLACK_SECONDS
+        )
+
+    async def async_flush(self, compact_before: int | None = None) -> None:
+        """Write the merged readings, then compact the file when it needs it.
+
+        Compaction drops the readings taken before compact_before. The new
+        file is complete when it replaces the current one, so a crash leaves
+        either of them intact.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            if self._map is None:
+                # Closed in the meantime.
+                return
+
+            if pending := len(self._pending):
+                count = self._count + pending
+                self._map, self._records = await loop.run_in_executor(
+                    None, self._write, self._pending[:pending].tobytes(), count
+                )
+                self._count = count
+                self._pending = self._pending[pending:]
+
+            if compact_before is None or not self.needs_compaction(compact_before):
+                return
+            dropped = int(np.searchsorted(self._records["timestamp"], compact_before))
+            fd, self._map, self._records = await loop.run_in_executor(
+                None, self._compact, dropped
+            )
+            self._fd = fd
+            self._first += dropped
+            self._count -= dropped
+            LOGGER.debug("Compacted %s readings out of %s", dropped, self.path)
+
+    def _write(self, data: bytes, count: int) -> tuple[mmap.mmap, np.ndarray]:
+        """Append records to the file and map all count records."""
+        # A single write, a crash leaves at most one partial record.
+        os.write(self._fd, data)
+        return self._mapped(self._fd, count)
+
+    def _compact(self, dropped: int) -> tuple[int, mmap.mmap, np.ndarray]:
+        """Replace the file with one without its first records.
+
+        Return the descriptor and the map of the new file.
+        """
+        records = self._records[dropped:]
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, self._first + dropped))
+            file.write(records.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        os.close(self._fd)
+        return (fd, *self._mapped(fd, len(records)))
+
+    async def async_close(self) -> None:
+        """Write the merged readings and close the file, once flushes are done."""
+        async with self._lock:
+            if self._map is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self) -> None:
+        """Write the merged readings and close the file.
+
+        The map is released once no view uses it.
+        """
+        if len(self._pending):
+            os.write(self._fd, self._pending.tobytes())
+        self._pending = np.empty(0, RECORD_DTYPE)
+        self._records = np.empty(0, RECORD_DTYPE)
+        self._map = None
+        os.close(self._fd)
@@ -0,0 +1,105 @@
+"""In-memory instrumentation of the LibreLink hot paths."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+
+# Upper bounds of the buckets, in seconds for timings and bytes for sizes.
+TIME_BUCKETS = (
+    0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0,
+)  # fmt: skip
+SIZE_BUCKETS = tuple(2**exponent for exponent in range(8, 25))
+
+
+class Histogram:
+    """Fixed bucket histogram, recording a value costs one bisection.
+
+    Percentiles are estimated as the upper bound of the bucket holding them.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "total", "last", "min", "max")
+
+    def __init__(self, bounds: tuple[float, ...] = TIME_BUCKETS) -> None:
+        """Initialize an empty histogram."""
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last: float | None = None
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def record(self, value: float) -> None:
+        """Add a value."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float | None:
+        """Return an estimate of a percentile of the values."""
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Return a summary of the histogram."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "last": self.last,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": dict(zip((*self.bounds, "inf"), self.buckets)),
+        }
+
+
+class Instrumentation:
+    """Named histograms and counters of an API client and its coordinator."""
+
+    def __init__(self) -> None:
+        """Initialize without any measurement."""
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: Counter[str] = Counter()
+
+    def record(
+        self, name: str, value: float, bounds: tuple[float, ...] = TIME_BUCKETS
+    ) -> None:
+        """Add a value, a duration in seconds by default, to a histogram."""
+        if (histogram := self.histograms.get(name)) is None:
+            histogram = self.histograms[name] = Histogram(bounds)
+        histogram.record(value)
+
+    def count(self, name: str, increment: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] += increment
+
+    def last(self, name: str) -> float | None:
+        """Return the last value recorded in a histogram."""
+        histogram = self.histograms.get(name)
+        return histogram.last if histogram else None
+
+    def as_dict(self) -> dict:
+        """Return a summary of every histogram and counter."""
+        return {
+            "histograms": {
+                name: histogram.as_dict()
+                for name, histogram in sorted(self.histograms.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
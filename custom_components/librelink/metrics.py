@@ -0,0 +1,116 @@
+"""Rolling glycemic metrics for LibreLink."""
+
+from __future__ import annotations
+
+from math import sqrt
+
+from .history import GlucoseHistory
+
+
+class RollingGlycemicMetrics:
+    """Glycemic metrics over a sliding time window of a glucose history.
+
+    Running sums are kept for the readings inside the window, so adding a
+    reading or evicting one that left the window costs O(1). The window ends
+    at the most recent reading of the history.
+    """
+
+    def __init__(self, window: int, low: int, high: int) -> None:
+        """Initialize the metrics for a window given in seconds."""
+        self.window = window
+        self.low = low
+        self.high = high
+        self._reset(0)
+
+    def _reset(self, sequence: int) -> None:
+        """Empty the window and restart it at the given history sequence."""
+        self._head = sequence
+        self._tail = sequence
+        self.count = 0
+        self._sum = 0
+        self._sum_of_squares = 0
+        self._below = 0
+        self._above = 0
+
+    def _add(self, value: int) -> None:
+        self.count += 1
+        self._sum += value
+        self._sum_of_squares += value * value
+        if value < self.low:
+            self._below += 1
+        elif value > self.high:
+            self._above += 1
+
+    def _remove(self, value: int) -> None:
+        self.count -= 1
+        self._sum -= value
+        self._sum_of_squares -= value * value
+        if value < self.low:
+            self._below -= 1
+        elif value > self.high:
+            self._above -= 1
+
+    def set_target(self, low: int, high: int, history: GlucoseHistory) -> None:
+        """Change the range bounds, recounting the window if they moved."""
+        if (low, high) != (self.low, self.high):
+            self.low = low
+            self.high = high
+            self._reset(self._tail)
+            self.update(history)
+
+    def update(self, history: GlucoseHistory) -> None:
+        """Add the readings appended to history since the last update."""
+        oldest = history.total - len(history)
+        if self._tail < oldest:
+            # Readings were overwritten before leaving the window, recount.
+            self._reset(oldest)
+
+        for sequence in range(self._head, history.total):
+            self._add(history.point(sequence)[1])
+        self._head = history.total
+
+        if not self.count:
+            return
+        cutoff = history.last_timestamp - self.window
+        while self._tail < self._head:
+            timestamp, value, _ = history.point(self._tail)
+            if timestamp > cutoff:
+                break
+            self._remove(value)
+            self._tail += 1
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean glucose in mg/dL."""
+        return self._sum / self.count if self.count else None
+
+    @property
+    def coefficient_of_variation(self) -> float | None:
+        """Return the coefficient of variation in percent."""
+        if not self.count or not self._sum:
+            return None
+        mean = self._sum / self.count
+        variance = max(self._sum_of_squares / self.count - mean * mean, 0)
+        return sqrt(variance) / mean * 100
+
+    @property
+    def gmi(self) -> float | None:
+        """Return the glucose management indicator in percent."""
+        return 3.31 + 0.02392 * self._sum / self.count if self.count else None
+
+    @property
+    def time_in_range(self) -> float | None:
+        """Return the share of readings within the target range in percent."""
+        if not self.count:
+            return None
+        return (self.count - self._below - self._above) / self.count * 100
+
+    @property
+    def time_below_range(self) -> float | None:
+        """Return the share of readings below the target range in percent."""
+        return self._below / self.count * 100 if self.count else None
+
+    @property
+    def time_above_range(self) -> float | None:
+        """Return the share of readings above the target range in percent."""
+        return self._above / self.count * 100 if self.count else None
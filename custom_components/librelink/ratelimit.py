@@ -0,0 +1,72 @@
+"""Request rate limiting per LibreView region."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from .const import REGION_REQUEST_BURST, REGION_REQUESTS_PER_SECOND
+
+
+class RegionRateLimiter:
+    """Token bucket shared by every account polling one LibreView region.
+
+    Requests wait in turn for a token, which spaces out the polls of accounts
+    whose timers fire together. A 429 answer blocks the whole region for its
+    Retry-After delay.
+    """
+
+    def __init__(
+        self,
+        rate: float = REGION_REQUESTS_PER_SECOND,
+        burst: int = REGION_REQUEST_BURST,
+    ) -> None:
+        """Initialize the limiter."""
+        self.rate = rate
+        self.burst = burst
+        self.queue_depth = 0
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        self.queue_depth += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(
+                        self._tokens + (now - self._updated) * self.rate, self.burst
+                    )
+                    self._updated = now
+
+                    if now < self._blocked_until:
+                        await asyncio.sleep(self._blocked_until - now)
+                    elif self._tokens < 1:
+                        await asyncio.sleep((1 - self._tokens) / self.rate)
+                    else:
+                        self._tokens -= 1
+                        self.requests += 1
+                        return
+        finally:
+            self.queue_depth -= 1
+
+    def throttle(self, delay: float) -> None:
+        """Hold back every request of the region for delay seconds."""
+        self.throttled += 1
+        self._tokens = 0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+
+_LIMITERS: dict[str, RegionRateLimiter] = {}
+
+
+def get_region_limiter(base_url: str) -> RegionRateLimiter:
+    """Return the rate limiter shared by the accounts of a region."""
+    if base_url not in _LIMITERS:
+        _LIMITERS[base_url] = RegionRateLimiter()
+    return _LIMITERS[base_url]
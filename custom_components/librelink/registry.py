@@ -0,0 +1,67 @@
+"""Registry of the accounts following each LibreLink patient."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_PATIENTS
+
+if TYPE_CHECKING:
+    from .coordinator import LibreLinkDataUpdateCoordinator
+
+
+class PatientRegistry:
+    """Coordinators of the accounts following each patient.
+
+    When several accounts follow a patient, only the primary one fetches it,
+    the others keep its data and take over when it fails. The primary is the
+    first account subscribed whose coordinator is healthy.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._subscribers: dict[str, list[LibreLinkDataUpdateCoordinator]] = {}
+
+    def subscribe(
+        self, patient_id: str, coordinator: LibreLinkDataUpdateCoordinator
+    ) -> None:
+        """Add an account coordinator following a patient."""
+        subscribers = self._subscribers.setdefault(patient_id, [])
+        if coordinator not in subscribers:
+            subscribers.append(coordinator)
+
+    def unsubscribe(
+        self, patient_id: str, coordinator: LibreLinkDataUpdateCoordinator
+    ) -> None:
+        """Remove an account coordinator following a patient."""
+        subscribers = self._subscribers.get(patient_id, [])
+        if coordinator in subscribers:
+            subscribers.remove(coordinator)
+        if not subscribers:
+            self._subscribers.pop(patient_id, None)
+
+    def subscribers(self, patient_id: str) -> list[LibreLinkDataUpdateCoordinator]:
+        """Return the coordinators following a patient, in subscription order."""
+        return self._subscribers.get(patient_id, [])
+
+    def primary(self, patient_id: str) -> LibreLinkDataUpdateCoordinator | None:
+        """Return the coordinator fetching a patient."""
+        subscribers = self._subscribers.get(patient_id)
+        if not subscribers:
+            return None
+        return next((c for c in subscribers if c.healthy), subscribers[0])
+
+    @property
+    def patients(self) -> int:
+        """Return the number of unique patients followed."""
+        return len(self._subscribers)
+
+
+@callback
+def async_get_patient_registry(hass: HomeAssistant) -> PatientRegistry:
+    """Return the patient registry, creating it once."""
+    if (registry := hass.data.get(DATA_PATIENTS)) is None:
+        registry = hass.data[DATA_PATIENTS] = PatientRegistry()
+    return registry
@@ -0,0 +1,143 @@
+"""Poll scheduling for LibreLink."""
+
+from __future__ import annotations
+
+from collections import deque
+from enum import StrEnum
+from statistics import median
+
+from .const import (
+    POLL_BACKOFF_SECONDS,
+    POLL_MARGIN_SECONDS,
+    POLL_MIN_DELAY_SECONDS,
+    POLL_PROBE_HITS,
+    READING_CADENCE_SECONDS,
+    REFRESH_RATE_MIN,
+    TIER_DEMOTE_READINGS,
+    TIER_FAST_TRENDS,
+    TIER_HYSTERESIS_MGDL,
+    TIER_TARGET_MARGIN_MGDL,
+)
+
+
+class RefreshTier(StrEnum):
+    """How the readings of a patient are refreshed."""
+
+    BULK = "bulk"
+    FAST = "fast"
+
+
+class ReadingScheduler:
+    """Predict when the next reading of a patient lands and when to poll for it.
+
+    The cadence is the median interval between the last readings seen. The
+    publication lag, how long a reading takes to show up in the API, is the
+    delay at which the last reading was found. Polls are planned at the next
+    reading plus that lag; every few hits the lag is probed a little shorter
+    so the estimate keeps tightening. When a reading is late, polls back off
+    in short steps up to the refresh rate.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the scheduler."""
+        self._last_reading: float | None = None
+        self._intervals: deque[float] = deque(maxlen=10)
+        self._latencies: deque[float] = deque(maxlen=60)
+        self._lag = 0.0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def cadence(self) -> float:
+        """Return the expected interval between readings in seconds."""
+        if not self._intervals:
+            return READING_CADENCE_SECONDS
+        return median(self._intervals)
+
+    @property
+    def latency(self) -> float | None:
+        """Return the mean delay between a reading and its poll in seconds."""
+        if not self._latencies:
+            return None
+        return sum(self._latencies) / len(self._latencies)
+
+    def observe(self, reading: float, now: float) -> bool:
+        """Record the reading timestamp returned by a poll made at now.
+
+        Return whether the reading is a new one.
+        """
+        if self._last_reading is not None and reading <= self._last_reading:
+            # Polls made for other patients before this reading is due are
+            # not misses.
+            if now >= self._last_reading + self.cadence + self._lag:
+                self._misses += 1
+            return False
+
+        latency = max(now - reading, 0)
+        if self._last_reading is None or self._misses:
+            self._lag = latency
+            self._hits = 0
+        else:
+            interval = reading - self._last_reading
+            # Intervals spanning missed readings would skew the cadence.
+            if interval <= 2 * READING_CADENCE_SECONDS:
+                self._intervals.append(interval)
+            self._lag = min(self._lag, latency)
+            self._hits += 1
+            if self._hits >= POLL_PROBE_HITS:
+                self._lag = max(self._lag - POLL_MARGIN_SECONDS, 0)
+                self._hits = 0
+
+        self._latencies.append(latency)
+        self._last_reading = reading
+        self._misses = 0
+        return True
+
+    def overdue(self, now: float) -> bool:
+        """Return whether the next reading should have been found by now."""
+        return (
+            self._last_reading is not None
+            and now >= self._last_reading + self.cadence + self._lag
+        )
+
+    def next_delay(self, now: float) -> float:
+        """Return the number of seconds to wait before the next poll."""
+        if self._last_reading is None:
+            return REFRESH_RATE_MIN * 60
+
+        delay = self._last_reading + self.cadence + self._lag - now
+        if delay <= 0:
+            delay = POLL_BACKOFF_SECONDS * max(self._misses, 1)
+        return min(max(delay, POLL_MIN_DELAY_SECONDS), REFRESH_RATE_MIN * 60)
+
+
+class TierClassifier:
+    """Choose the refresh tier of a patient from its readings.
+
+    A reading within the margin of a target bound, outside the target, or
+    with a fast trend arrow promotes the patient to the fast tier at once.
+    It is demoted after several readings in a row inside a narrower band,
+    so that a patient hovering around the margin does not flip every poll.
+    """
+
+    def __init__(self) -> None:
+        """Initialize in the bulk tier."""
+        self.tier = RefreshTier.BULK
+        self._calm = 0
+
+    def observe(self, value: int, trend: int, low: int, high: int) -> RefreshTier:
+        """Record a new reading and return the tier of the patient."""
+        margin = TIER_TARGET_MARGIN_MGDL
+        if value <= low + margin or value >= high - margin or trend in TIER_FAST_TRENDS:
+            self.tier = RefreshTier.FAST
+            self._calm = 0
+        elif self.tier is RefreshTier.FAST:
+            margin += TIER_HYSTERESIS_MGDL
+            if low + margin < value < high - margin:
+                self._calm += 1
+                if self._calm >= TIER_DEMOTE_READINGS:
+                    self.tier = RefreshTier.BULK
+                    self._calm = 0
+            else:
+                self._calm = 0
+        return self.tier
@@ -9,8 +9,15 @@ from homeassistant.components.sensor import (
 )
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_UNIT_OF_MEASUREMENT, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_UNIT_OF_MEASUREMENT,
+    CONF_USERNAME,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -22,6 +29,7 @@ from .const import (
     GLUCOSE_TREND_ICON,
     GLUCOSE_TREND_MESSAGE,
     GLUCOSE_VALUE_ICON,
+    METRICS_WINDOWS,
     NAME,
     VERSION,
 )
@@ -53,65 +61,110 @@ async def async_setup_entry(
         ApplicationTimestampSensor(coordinator, pid),
         ExpirationTimestampSensor(coordinator, pid),
         LastMeasurementTimestampSensor(coordinator, pid),
+        RateOfChangeSensor(coordinator, pid, unit),
+    ]
+
+    for window in METRICS_WINDOWS:
+        sensors += [
+            TimeInRangeSensor(coordinator, pid, window),
+            TimeBelowRangeSensor(coordinator, pid, window),
+            TimeAboveRangeSensor(coordinator, pid, window),
+            MeanGlucoseSensor(coordinator, pid, window, unit),
+            CoefficientOfVariationSensor(coordinator, pid, window),
+            GMISensor(coordinator, pid, window),
+        ]
+
+    sensors += [
+        PollLatencySensor(coordinator, pid),
+        PollErrorRateSensor(coordinator, pid),
+        PayloadSizeSensor(coordinator, pid, "connections"),
+        PayloadSizeSensor(coordinator, pid, "graph"),
     ]
 
     async_add_entities(sensors)
 
 
 class LibreLinkSensorBase(CoordinatorEntity[LibreLinkDataUpdateCoordinator]):
-    """LibreLink Sensor base class."""
+    """LibreLink Sensor base class.
+
+    Static metadata is set once through the _attr_* fields, only the values
+    are computed on each state write.
+    """
+
+    _attr_attribution = ATTRIBUTION
+    _attr_has_entity_name = True
+    # Whether the state only changes with a new reading of the patient.
+    _follows_readings = True
 
     def __init__(self, coordinator: LibreLinkDataUpdateCoordinator, pid: str) -> None:
         """Initialize the device class."""
         super().__init__(coordinator)
 
         self.id = pid
-
-    @property
-    def device_info(self):
-        """Return the device info of the sensor."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._data.id)},
-            name=self._data.name,
+        self._last_written: tuple | None = None
+        self._attr_unique_id = f"{pid} {self._attr_name}".replace(" ", "_").lower()
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, pid)},
+            name=coordinator.data[pid].name,
             model=VERSION,
             manufacturer=NAME,
         )
 
-    @property
-    def attribution(self):
-        """Return the attribution for this entity."""
-        return ATTRIBUTION
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when it changed since the last write."""
+        available = self.available
+        status = (available, self.coordinator.source(self.id).stale)
+        if (
+            self._follows_readings
+            and self._last_written is not None
+            and self._last_written[0] == status
+            and self.id not in self.coordinator.changed_patients
+        ):
+            self.coordinator.skipped_state_writes += 1
+            return
+
+        # Everything written besides the static metadata, the icon and the
+        # attributes can change while the state does not.
+        written = (
+            status,
+            (self.state, self.icon, self.extra_state_attributes)
+            if available
+            else None,
+        )
+        if written == self._last_written:
+            self.coordinator.skipped_state_writes += 1
+            return
 
-    @property
-    def has_entity_name(self):
-        """Return if the entity has a name."""
-        return True
+        self._last_written = written
+        self.coordinator.state_writes += 1
+        super()._handle_coordinator_update()
 
     @property
     def _data(self):
         return self.coordinator.data[self.id]
 
     @property
-    def unique_id(self):
-        """Return the unique id of the sensor."""
-        return f"{self._data.id} {self.name}".replace(" ", "_").lower()
+    def extra_state_attributes(self):
+        """Return the state attributes of the librelink sensor."""
+        source = self.coordinator.source(self.id)
+        if not source.stale:
+            return None
+        attrs = {"Stale": True}
+        if source.stale_since:
+            attrs["Stale since"] = source.stale_since
+        return attrs
 
 
 class LibreLinkSensor(LibreLinkSensorBase, SensorEntity):
     """LibreLink Sensor class."""
 
-    @property
-    def icon(self):
-        """Return the icon for the frontend."""
-        return GLUCOSE_VALUE_ICON
+    _attr_icon = GLUCOSE_VALUE_ICON
 
 class TrendSensor(LibreLinkSensor):
     """Glucose Trend Sensor class."""
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return "Trend"
+    _attr_name = "Trend"
 
     @property
     def native_value(self):
@@ -126,6 +179,9 @@ class TrendSensor(LibreLinkSensor):
 class MeasurementSensor(TrendSensor, LibreLinkSensor):
     """Glucose Measurement Sensor class."""
 
+    _attr_name = "Measurement"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
     def __init__(
         self,
         coordinator: LibreLinkDataUpdateCoordinator,
@@ -135,47 +191,23 @@ class MeasurementSensor(TrendSensor, LibreLinkSensor):
         """Initialize the sensor class."""
         super().__init__(coordinator, pid)
         self.unit = unit
-
-    @property
-    def state_class(self):
-        """Return the state class of the sensor."""
-        return SensorStateClass.MEASUREMENT
-
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return "Measurement"
+        self._attr_native_unit_of_measurement = unit.unit_of_measurement
+        self._attr_suggested_display_precision = unit.suggested_display_precision
 
     @property
     def native_value(self):
         """Return the native value of the sensor."""
         return self.unit.from_mg_per_dl(self._data.measurement.value)
 
-    @property
-    def suggested_display_precision(self):
-        """Return the suggested precision of the sensor."""
-        return self.unit.suggested_display_precision
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement of the sensor."""
-        return self.unit.unit_of_measurement
-
 class TimestampSensor(LibreLinkSensor):
     """Timestamp Sensor class."""
 
-    @property
-    def device_class(self):
-        """Return the device class of the sensor."""
-        return SensorDeviceClass.TIMESTAMP
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
 
 class ApplicationTimestampSensor(TimestampSensor):
     """Sensor Days Sensor class."""
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return "Application Timestamp"
+    _attr_name = "Application Timestamp"
 
     @property
     def available(self):
@@ -200,15 +232,12 @@ class ApplicationTimestampSensor(TimestampSensor):
                 "Activation date": self._data.device.application_timestamp,
             }
 
-        return attrs
+        return attrs | (super().extra_state_attributes or {})
 
 class ExpirationTimestampSensor(ApplicationTimestampSensor):
     """Sensor Days Sensor class."""
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return "Expiration Timestamp"
+    _attr_name = "Expiration Timestamp"
 
     @property
     def native_value(self):
@@ -218,12 +247,205 @@ class ExpirationTimestampSensor(ApplicationTimestampSensor):
 class LastMeasurementTimestampSensor(TimestampSensor):
     """Sensor Delay Sensor class."""
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return "Last Measurement Timestamp"
+    _attr_name = "Last Measurement Timestamp"
 
     @property
     def native_value(self):
         """Return the native value of the sensor."""
         return self._data.measurement.timestamp
+
+class RateOfChangeSensor(LibreLinkSensor):
+    """Glucose Rate Of Change Sensor class."""
+
+    _attr_name = "Rate Of Change"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: LibreLinkDataUpdateCoordinator,
+        pid: str,
+        unit: UnitOfMeasurement,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, pid)
+        self.unit = unit
+        self._attr_native_unit_of_measurement = f"{unit.unit_of_measurement}/min"
+        self._attr_suggested_display_precision = unit.suggested_display_precision + 1
+
+    @property
+    def available(self):
+        """Return if the sensor data are available."""
+        return super().available and self.coordinator.forecast(self.id) is not None
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        rate = self.coordinator.forecast(self.id).rate
+        return round(self.unit.from_mg_per_dl(rate), 2)
+
+class GlycemicMetricSensor(LibreLinkSensor):
+    """Rolling glycemic metric Sensor class."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_suggested_display_precision = 1
+
+    metric_name: str
+    metric: str
+
+    def __init__(
+        self, coordinator: LibreLinkDataUpdateCoordinator, pid: str, window: str
+    ) -> None:
+        """Initialize the sensor class."""
+        self.window = window
+        self._attr_name = f"{self.metric_name} {window}"
+        super().__init__(coordinator, pid)
+
+    @property
+    def _metrics(self):
+        return self.coordinator.metrics(self.id, self.window)
+
+    @property
+    def available(self):
+        """Return if the sensor data are available."""
+        return (
+            super().available
+            and self._metrics is not None
+            and self._metrics.count > 0
+        )
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return round(getattr(self._metrics, self.metric), 1)
+
+class TimeInRangeSensor(GlycemicMetricSensor):
+    """Time In Range Sensor class."""
+
+    metric_name = "Time In Range"
+    metric = "time_in_range"
+
+class TimeBelowRangeSensor(GlycemicMetricSensor):
+    """Time Below Range Sensor class."""
+
+    metric_name = "Time Below Range"
+    metric = "time_below_range"
+
+class TimeAboveRangeSensor(GlycemicMetricSensor):
+    """Time Above Range Sensor class."""
+
+    metric_name = "Time Above Range"
+    metric = "time_above_range"
+
+class CoefficientOfVariationSensor(GlycemicMetricSensor):
+    """Coefficient Of Variation Sensor class."""
+
+    metric_name = "Coefficient Of Variation"
+    metric = "coefficient_of_variation"
+
+class GMISensor(GlycemicMetricSensor):
+    """Glucose Management Indicator Sensor class."""
+
+    metric_name = "GMI"
+    metric = "gmi"
+
+class MeanGlucoseSensor(GlycemicMetricSensor):
+    """Mean Glucose Sensor class."""
+
+    metric_name = "Mean Glucose"
+    metric = "mean"
+
+    def __init__(
+        self,
+        coordinator: LibreLinkDataUpdateCoordinator,
+        pid: str,
+        window: str,
+        unit: UnitOfMeasurement,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, pid, window)
+        self.unit = unit
+        self._attr_native_unit_of_measurement = unit.unit_of_measurement
+        self._attr_suggested_display_precision = unit.suggested_display_precision
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return round(self.unit.from_mg_per_dl(self._metrics.mean), 1)
+
+class DiagnosticSensor(LibreLinkSensorBase, SensorEntity):
+    """Diagnostic Sensor class, disabled by default.
+
+    Unlike the other entities of the patient, its state is checked on every
+    poll, failed ones included, and written whenever it changed.
+    """
+
+    _follows_readings = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def _instrumentation(self):
+        return self.coordinator.api.instrumentation
+
+class PollLatencySensor(DiagnosticSensor):
+    """Poll Latency Sensor class."""
+
+    _attr_name = "Poll Latency"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 0
+
+    @property
+    def available(self):
+        """Return if the sensor data are available."""
+        return super().available and self._instrumentation.last("poll") is not None
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return round(self._instrumentation.last("poll") * 1000, 1)
+
+class PollErrorRateSensor(DiagnosticSensor):
+    """Poll Error Rate Sensor class."""
+
+    _attr_name = "Poll Error Rate"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_suggested_display_precision = 1
+
+    @property
+    def available(self):
+        """Return if the sensor data are available."""
+        return super().available and self.coordinator.error_rate is not None
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return round(self.coordinator.error_rate, 1)
+
+class PayloadSizeSensor(DiagnosticSensor):
+    """Payload Size Sensor class, for the answers of one endpoint."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+
+    def __init__(
+        self, coordinator: LibreLinkDataUpdateCoordinator, pid: str, endpoint: str
+    ) -> None:
+        """Initialize the sensor class."""
+        self.histogram = f"payload_{endpoint}"
+        self._attr_name = f"{endpoint.capitalize()} Payload Size"
+        super().__init__(coordinator, pid)
+
+    @property
+    def available(self):
+        """Return if the sensor data are available."""
+        return (
+            super().available and self._instrumentation.last(self.histogram) is not None
+        )
+
+    @property
+    def native_value(self):
+        """Return the native value of the sensor."""
+        return int(self._instrumentation.last(self.histogram))
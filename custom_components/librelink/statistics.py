@@ -0,0 +1,93 @@
+"""Long-term statistics backfill for LibreLink."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+import time
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+
+from .api import LibreLinkAPI, Patient
+from .const import DOMAIN, LOGGER, STATISTICS_IMPORT_CHUNK_HOURS
+from .history import GlucoseHistory
+from .historyfile import MappedGlucoseHistory
+
+
+def glucose_statistic_id(patient_id: str) -> str:
+    """Return the external statistic id of the glucose of a patient."""
+    return f"{DOMAIN}:glucose_{slugify(patient_id)}"
+
+
+async def async_import_statistics(
+    hass: HomeAssistant,
+    api: LibreLinkAPI,
+    patient: Patient,
+    history: GlucoseHistory | MappedGlucoseHistory | None = None,
+) -> int:
+    """Backfill the hourly glucose statistics of a patient after a gap.
+
+    Readings from the history, whose gaps were already filled from the
+    graph endpoint, and from the logbook endpoint are aggregated per
+    completed hour after the last statistic already stored, then imported in
+    chunks. Nothing is fetched when the statistics are up to date. Return
+    the number of hours imported.
+    """
+    recorder = get_instance(hass)
+    statistic_id = glucose_statistic_id(patient.id)
+
+    last = await recorder.async_add_executor_job(
+        get_last_statistics, hass, 1, statistic_id, True, {"mean"}
+    )
+    since = int(last[statistic_id][0]["start"]) + 3600 if last else 0
+    until = int(time.time()) // 3600 * 3600
+    if since >= until:
+        return 0
+
+    sources = [await api.async_get_logbook(patient.id)]
+    if history:
+        sources.append(history.window(since))
+
+    readings: dict[int, int] = {}
+    for timestamps, values, _ in sources:
+        readings.update(zip(timestamps.tolist(), values.tolist()))
+
+    hours: dict[int, list[int]] = {}
+    for timestamp, value in readings.items():
+        if since <= timestamp < until:
+            hours.setdefault(timestamp // 3600 * 3600, []).append(value)
+
+    statistics = [
+        StatisticData(
+            start=datetime.fromtimestamp(hour, tz=UTC),
+            mean=sum(values) / len(values),
+            min=min(values),
+            max=max(values),
+        )
+        for hour, values in sorted(hours.items())
+    ]
+    metadata = StatisticMetaData(
+        has_mean=True,
+        has_sum=False,
+        name=f"{patient.name} Glucose",
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement="mg/dL",
+    )
+
+    # Bounded chunks, each one flushed before queuing the next, keep the
+    # recorder queue short on multi-day gaps.
+    for start in range(0, len(statistics), STATISTICS_IMPORT_CHUNK_HOURS):
+        async_add_external_statistics(
+            hass, metadata, statistics[start : start + STATISTICS_IMPORT_CHUNK_HOURS]
+        )
+        await recorder.async_block_till_done()
+
+    LOGGER.debug("Imported %s hours of statistics for %s", len(statistics), patient.id)
+    return len(statistics)
@@ -0,0 +1,56 @@
+"""Fast parsing of LibreView timestamps.
+
+LibreView reports timestamps such as ``FactoryTimestamp`` as
+``"1/31/2024 3:04:05 PM"`` (``%m/%d/%Y %I:%M:%S %p``) in UTC.
+``datetime.strptime`` is slow for this, so the format is decoded by hand and
+the date part, shared by every reading of a day, is cached.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=64)
+def _parse_date(value: str) -> tuple[int, int, int, int]:
+    """Return year, month, day and the epoch of midnight UTC for a m/d/Y date."""
+    month, day, year = value.split("/")
+    midnight = datetime(int(year), int(month), int(day), tzinfo=UTC)
+    return midnight.year, midnight.month, midnight.day, int(midnight.timestamp())
+
+
+def _parse_time(value: str, meridiem: str) -> tuple[int, int, int]:
+    """Return the 24-hour hour, minute and second for a 12-hour I:M:S time."""
+    hour, minute, second = value.split(":")
+    hour, minute, second = int(hour), int(minute), int(second)
+    if not (1 <= hour <= 12 and 0 <= minute <= 59 and 0 <= second <= 59):
+        raise ValueError(f"Invalid time: {value!r}")
+
+    meridiem = meridiem.upper()
+    if meridiem == "AM":
+        return hour % 12, minute, second
+    if meridiem == "PM":
+        return hour % 12 + 12, minute, second
+    raise ValueError(f"Invalid meridiem: {meridiem!r}")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a LibreView timestamp into an aware UTC datetime."""
+    date, time, meridiem = value.split()
+    year, month, day, _ = _parse_date(date)
+    hour, minute, second = _parse_time(time, meridiem)
+    return datetime(year, month, day, hour, minute, second, tzinfo=UTC)
+
+
+def parse_timestamps_to_epoch(values: Iterable[str]) -> array:
+    """Parse LibreView timestamps into an array of epoch seconds."""
+    result = array("q")
+    append = result.append
+    for value in values:
+        date, time, meridiem = value.split()
+        hour, minute, second = _parse_time(time, meridiem)
+        append(_parse_date(date)[3] + hour * 3600 + minute * 60 + second)
+    return result
@@ -0,0 +1,37 @@
+"""Tests for the headless collector."""
+
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.librelink.collector import _STOP, Collector
+
+
+class ListSink:
+    """Sink keeping the written batches in memory."""
+
+    def __init__(self) -> None:
+        """Initialize an empty sink."""
+        self.batches: list[list] = []
+
+    def write(self, readings: list) -> None:
+        """Keep a batch."""
+        self.batches.append(readings)
+
+
+def test_partial_batch_is_flushed_after_flush_interval() -> None:
+    """A batch smaller than batch_size is written flush_interval after it starts."""
+
+    async def run() -> None:
+        sink = ListSink()
+        collector = Collector([], sink, batch_size=500, flush_interval=0.2)
+        writer = asyncio.create_task(collector._async_write())
+        collector._queue.put_nowait(("patient", 60, 100, 3))
+        await asyncio.sleep(1)
+        assert sink.batches == [[("patient", 60, 100, 3)]]
+
+        collector._queue.put_nowait(_STOP)
+        await writer
+        assert collector.written == 1
+
+    asyncio.run(run())
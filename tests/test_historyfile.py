@@ -0,0 +1,104 @@
+"""Tests for the memory-mapped glucose history."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+from custom_components.librelink.historyfile import MappedGlucoseHistory
+
+HOUR = 3600
+
+
+def _fill(history: MappedGlucoseHistory, start: int, count: int) -> None:
+    for timestamp in range(start, start + count * HOUR, HOUR):
+        history.append(timestamp, 100 + timestamp % 50, 3)
+
+
+def test_merges_are_written_by_flush(tmp_path) -> None:
+    """Merged readings stay in memory until flushed, then are views of the file."""
+    path = str(tmp_path / "patient.bin")
+
+    async def run() -> None:
+        history = MappedGlucoseHistory(path)
+        size = os.path.getsize(path)
+        _fill(history, HOUR, 3)
+        assert os.path.getsize(path) == size
+        assert len(history) == 3
+        assert history.point(2)[0] == 3 * HOUR
+        assert history.window(0)[0].tolist() == [HOUR, 2 * HOUR, 3 * HOUR]
+
+        await history.async_flush()
+        assert os.path.getsize(path) == size + 3 * 16
+        timestamps, _, _ = history.window(0)
+        assert not timestamps.flags.writeable
+        await history.async_close()
+
+    asyncio.run(run())
+
+
+def test_merge_during_compaction_is_kept(tmp_path) -> None:
+    """Readings merged while the compacted file is written survive the swap."""
+    path = str(tmp_path / "patient.bin")
+
+    async def run() -> None:
+        history = MappedGlucoseHistory(path)
+        _fill(history, HOUR, 30)
+        flush = asyncio.create_task(history.async_flush(28 * HOUR))
+        await asyncio.sleep(0)
+        _fill(history, 31 * HOUR, 3)
+        await flush
+
+        assert len(history) == 6
+        assert history.total == 33
+        assert history.point(32)[0] == 33 * HOUR
+        timestamps, _, _ = history.window(0)
+        assert timestamps.tolist() == list(range(28 * HOUR, 34 * HOUR, HOUR))
+
+        # Readings merged after the swap go to the new file.
+        _fill(history, 34 * HOUR, 1)
+        await history.async_close()
+
+    asyncio.run(run())
+    reopened = MappedGlucoseHistory(path)
+    assert len(reopened) == 7
+    assert reopened.total == 34
+    assert reopened.last_timestamp == 34 * HOUR
+    reopened.close()
+
+
+def test_views_survive_compaction(tmp_path) -> None:
+    """Views taken before a compaction keep their readings."""
+
+    async def run() -> None:
+        history = MappedGlucoseHistory(str(tmp_path / "patient.bin"))
+        _fill(history, HOUR, 30)
+        await history.async_flush()
+        timestamps, _, _ = history.window(0)
+
+        await history.async_flush(28 * HOUR)
+        assert timestamps.tolist() == list(range(HOUR, 31 * HOUR, HOUR))
+        assert len(history) == 3
+        await history.async_close()
+
+    asyncio.run(run())
+
+
+def test_close_waits_for_the_compaction(tmp_path) -> None:
+    """A history closed during a compaction leaves the compacted file."""
+    path = tmp_path / "patient.bin"
+
+    async def run() -> None:
+        history = MappedGlucoseHistory(str(path))
+        _fill(history, HOUR, 30)
+        flush = asyncio.create_task(history.async_flush(28 * HOUR))
+        await asyncio.sleep(0)
+        _fill(history, 31 * HOUR, 1)
+        await asyncio.gather(flush, history.async_close())
+        await history.async_flush()
+
+    asyncio.run(run())
+    assert not (tmp_path / "patient.bin.tmp").exists()
+    reopened = MappedGlucoseHistory(str(path))
+    assert len(reopened) == 4
+    reopened.close()
@@ -0,0 +1,21 @@
+"""Tests for the poll scheduling."""
+
+from __future__ import annotations
+
+from custom_components.librelink.const import POLL_BACKOFF_SECONDS
+from custom_components.librelink.scheduler import ReadingScheduler
+
+
+def test_late_reading_is_overdue_and_backs_off_in_short_steps() -> None:
+    """A reading missing at its expected time is polled for again shortly."""
+    scheduler = ReadingScheduler()
+    scheduler.observe(1000, 1010)
+    scheduler.observe(1060, 1070)
+
+    assert not scheduler.overdue(1100)
+    assert scheduler.next_delay(1100) == 30
+
+    # The poll made when the reading was due did not find it.
+    scheduler.observe(1060, 1130)
+    assert scheduler.overdue(1130)
+    assert scheduler.next_delay(1130) == POLL_BACKOFF_SECONDS